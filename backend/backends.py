@@ -0,0 +1,9 @@
+import importlib
+
+
+def load_backend(spec: str, setting: str, *args):
+    """Instantiate a pluggable backend named "module:ClassName" by the given environment setting"""
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown {setting}: {spec}")
+    return getattr(importlib.import_module(module_name), class_name)(*args)
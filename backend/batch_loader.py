@@ -0,0 +1,98 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, Hashable, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+class BatchLoader(ABC):
+    """DataLoader-style batching: ids requested in the same event-loop tick share one query.
+
+    Results are memoized for the loader's lifetime, so a loader should live for one request.
+    """
+
+    def __init__(self):
+        self.cache: Dict[Hashable, asyncio.Future] = {}
+        self.pending: List[Hashable] = []
+
+    @abstractmethod
+    async def fetch(self, keys: List[Hashable]) -> Dict[Hashable, object]:
+        ...
+
+    def missing(self, key: Hashable):
+        return None
+
+    def load(self, key: Hashable) -> asyncio.Future:
+        if key in self.cache:
+            return self.cache[key]
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.cache[key] = future
+        if not self.pending:
+            # First key this tick: dispatch once everyone else has queued their keys
+            loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        self.pending.append(key)
+        return future
+
+    async def load_many(self, keys: List[Hashable]) -> list:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    async def _dispatch(self):
+        keys, self.pending = self.pending, []
+        try:
+            results = await self.fetch(keys)
+        except Exception as e:
+            for key in keys:
+                if not self.cache[key].done():
+                    self.cache[key].set_exception(e)
+            return
+        for key in keys:
+            if not self.cache[key].done():
+                self.cache[key].set_result(results.get(key, self.missing(key)))
+
+
+class DocumentLoader(BatchLoader):
+    """Loads documents by string ObjectId with one $in query per batch"""
+
+    def __init__(self, collection, projection: Optional[dict] = None):
+        super().__init__()
+        self.collection = collection
+        self.projection = projection
+
+    async def fetch(self, keys):
+        object_ids = []
+        for key in keys:
+            try:
+                object_ids.append(ObjectId(key))
+            except (InvalidId, TypeError):
+                pass  # Resolves to None like a missing document
+        docs = await self.collection.find(
+            {"_id": {"$in": object_ids}}, self.projection
+        ).to_list(length=len(object_ids))
+        return {str(doc["_id"]): doc for doc in docs}
+
+
+class GroupLoader(BatchLoader):
+    """Loads every document whose key_field matches, grouped per key, with one $in query per batch"""
+
+    def __init__(self, collection, key_field: str, sort=None, per_key_limit: Optional[int] = None):
+        super().__init__()
+        self.collection = collection
+        self.key_field = key_field
+        self.sort = sort
+        self.per_key_limit = per_key_limit
+
+    def missing(self, key):
+        return []
+
+    async def fetch(self, keys):
+        cursor = self.collection.find({self.key_field: {"$in": keys}})
+        if self.sort:
+            cursor = cursor.sort(self.sort)
+        groups: Dict[Hashable, list] = {}
+        async for doc in cursor:
+            group = groups.setdefault(doc[self.key_field], [])
+            if self.per_key_limit is None or len(group) < self.per_key_limit:
+                group.append(doc)
+        return groups
@@ -0,0 +1,164 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import os
+import re
+import uuid
+from abc import ABC, abstractmethod
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from PIL import Image, UnidentifiedImageError
+from pymongo.errors import DuplicateKeyError
+
+# Public URL prefix for stored images; listing documents hold these references
+IMAGE_URL_PREFIX = "/api/images/"
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+DATA_URL_RE = re.compile(r"^data:(?P<type>[\w.+-]+/[\w.+-]+)?(;[^,]*)?;base64,", re.IGNORECASE)
+
+# Raster formats we store and serve, keyed by the format Pillow detects; anything else
+# (notably SVG, which can carry script) is rejected at upload time
+ALLOWED_IMAGE_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "GIF": "image/gif",
+    "WEBP": "image/webp",
+}
+
+
+def compute_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def image_url(digest: str) -> str:
+    return f"{IMAGE_URL_PREFIX}{digest}"
+
+
+def digest_from_url(url: str) -> Optional[str]:
+    """Return the digest for an image reference, or None for inline data"""
+    if url.startswith(IMAGE_URL_PREFIX):
+        digest = url[len(IMAGE_URL_PREFIX):]
+        if DIGEST_RE.match(digest):
+            return digest
+    return None
+
+
+def detect_image_type(data: bytes) -> str:
+    """Content type of an allowed raster image, detected from its bytes; raises ValueError otherwise"""
+    try:
+        with Image.open(BytesIO(data)) as image:
+            image_format = image.format
+            image.verify()
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+        raise ValueError("Unrecognized image data")
+    if image_format not in ALLOWED_IMAGE_TYPES:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    return ALLOWED_IMAGE_TYPES[image_format]
+
+
+def decode_image(value: str) -> Tuple[bytes, str]:
+    """Decode a base64 image (data URL or bare base64) into bytes and its detected content type"""
+    # The declared data-URL type is ignored; only the bytes decide what gets stored
+    match = DATA_URL_RE.match(value)
+    if match:
+        value = value[match.end():]
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid base64 image data")
+    if not data:
+        raise ValueError("Empty image")
+    return data, detect_image_type(data)
+
+
+class BlobStore(ABC):
+    """Content-addressed blob storage keyed by sha256 digest"""
+
+    @abstractmethod
+    async def put(self, data: bytes, content_type: str) -> str:
+        ...
+
+    @abstractmethod
+    async def get(self, digest: str) -> Optional[Tuple[bytes, str]]:
+        ...
+
+
+class LocalDiskBlobStore(BlobStore):
+    """Stores blobs under root/<aa>/<digest> with the content type in a sidecar file"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def _write(self, digest: str, data: bytes, content_type: str):
+        path = self._path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial blob
+        tmp_path = path.with_name(f".{digest}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(data)
+        path.with_suffix(".type").write_text(content_type)
+        os.replace(tmp_path, path)
+
+    def _read(self, digest: str) -> Optional[Tuple[bytes, str]]:
+        path = self._path(digest)
+        if not path.exists():
+            return None
+        type_path = path.with_suffix(".type")
+        content_type = type_path.read_text() if type_path.exists() else "application/octet-stream"
+        return path.read_bytes(), content_type
+
+    async def put(self, data: bytes, content_type: str) -> str:
+        digest = compute_digest(data)
+        await asyncio.to_thread(self._write, digest, data, content_type)
+        return digest
+
+    async def get(self, digest: str) -> Optional[Tuple[bytes, str]]:
+        return await asyncio.to_thread(self._read, digest)
+
+
+class GridFSBlobStore(BlobStore):
+    """Stores blobs in a GridFS bucket using the digest as the file _id"""
+
+    def __init__(self, database, bucket_name: str = "images"):
+        self.files = database[f"{bucket_name}.files"]
+        self.bucket = AsyncIOMotorGridFSBucket(database, bucket_name=bucket_name)
+
+    async def put(self, data: bytes, content_type: str) -> str:
+        digest = compute_digest(data)
+        if await self.files.find_one({"_id": digest}, {"_id": 1}):
+            return digest
+        try:
+            await self.bucket.upload_from_stream_with_id(
+                digest, digest, data, metadata={"content_type": content_type}
+            )
+        except DuplicateKeyError:
+            pass  # Another request stored the same bytes concurrently
+        return digest
+
+    async def get(self, digest: str) -> Optional[Tuple[bytes, str]]:
+        file_doc = await self.files.find_one({"_id": digest})
+        if not file_doc:
+            return None
+        stream = await self.bucket.open_download_stream(digest)
+        data = await stream.read()
+        content_type = (file_doc.get("metadata") or {}).get("content_type", "application/octet-stream")
+        return data, content_type
+
+
+def create_blob_store(database) -> BlobStore:
+    """Build the blob store selected by IMAGE_STORE_BACKEND ("gridfs" or "local")"""
+    backend = os.environ.get('IMAGE_STORE_BACKEND', 'gridfs').lower()
+    if backend == "local":
+        default_path = Path(__file__).parent / "image_store"
+        return LocalDiskBlobStore(Path(os.environ.get('IMAGE_STORE_PATH', default_path)))
+    if backend == "gridfs":
+        return GridFSBlobStore(database)
+    raise ValueError(f"Unknown IMAGE_STORE_BACKEND: {backend}")
@@ -0,0 +1,114 @@
+import csv
+import math
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Bundled offline centroids; GAZETTEER_PATH can list other CSVs (same columns), separated by os.pathsep.
+# Columns: type (zip, city or state), name, state, latitude, longitude
+DATA_DIR = Path(__file__).parent / "data"
+DEFAULT_GAZETTEER_PATHS = [DATA_DIR / "gazetteer.csv", DATA_DIR / "zip_centroids.csv"]
+
+EARTH_RADIUS_MILES = 3963.2
+METERS_PER_MILE = 1609.344
+
+ZIP_RE = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower().replace(".", ""))
+
+
+class Gazetteer:
+    def __init__(self, paths: List[Path]):
+        self.zips: Dict[str, Tuple[Tuple[float, float], str]] = {}
+        self.cities: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self.city_states: Dict[str, set] = {}
+        self.states: Dict[str, Tuple[float, float]] = {}
+        self.state_codes: Dict[str, str] = {}
+
+        for path in paths:
+            with open(path, newline="") as handle:
+                for row in csv.DictReader(handle):
+                    self._add(row)
+
+    def _add(self, row: dict):
+        state = row["state"].strip().upper()
+        point = (float(row["longitude"]), float(row["latitude"]))
+        kind = row["type"].strip()
+        if kind == "zip":
+            self.zips[row["name"].strip()] = (point, state)
+        elif kind == "city":
+            name = _normalize(row["name"])
+            self.cities[(name, state)] = point
+            self.city_states.setdefault(name, set()).add(state)
+        elif kind == "state":
+            self.states[state] = point
+            self.state_codes[_normalize(row["name"])] = state
+            self.state_codes[state.lower()] = state
+
+    def _state_code(self, text: str) -> Optional[str]:
+        # "TX", "Texas" or "TX 75001"
+        text = ZIP_RE.sub("", text)
+        return self.state_codes.get(_normalize(text))
+
+    def lookup(self, location: str) -> Optional[Tuple[Tuple[float, float], str]]:
+        """Resolve free text like "Austin, TX", "75001" or "Texas" to ((lng, lat), precision)"""
+        if not location:
+            return None
+
+        parts = [part for part in location.split(",") if part.strip()]
+        if not parts:
+            return None
+
+        # Only a trailing ZIP counts ("Austin, TX 78701"); street numbers like "10502 Ranch Rd" are not ZIPs
+        zip_match = ZIP_RE.search(parts[-1].strip().split()[-1])
+        if zip_match and zip_match.group(1) in self.zips:
+            point, zip_state = self.zips[zip_match.group(1)]
+            text_state = self._state_code(parts[-1])
+            if not text_state or text_state == zip_state:
+                return point, "zip"
+        state = self._state_code(parts[-1]) if len(parts) > 1 else None
+        city = _normalize(parts[-2] if state else parts[-1])
+
+        if state and (city, state) in self.cities:
+            return self.cities[(city, state)], "city"
+        if not state:
+            # A bare state name, or a city name that only exists in one state
+            state = self._state_code(city)
+            if not state and len(self.city_states.get(city, ())) == 1:
+                (only_state,) = self.city_states[city]
+                return self.cities[(city, only_state)], "city"
+        if state and state in self.states:
+            return self.states[state], "state"
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer() -> Gazetteer:
+    paths = os.environ.get('GAZETTEER_PATH')
+    if not paths:
+        return Gazetteer(DEFAULT_GAZETTEER_PATHS)
+    return Gazetteer([Path(path) for path in paths.split(os.pathsep) if path])
+
+
+def resolve_location(location: str) -> Optional[Tuple[dict, str]]:
+    """Return (GeoJSON point, precision) for a location string, or None if it can't be resolved offline"""
+    result = get_gazetteer().lookup(location)
+    if not result:
+        return None
+    (longitude, latitude), precision = result
+    return {"type": "Point", "coordinates": [longitude, latitude]}, precision
+
+
+def miles_to_radians(miles: float) -> float:
+    return miles / EARTH_RADIUS_MILES
+
+
+def distance_miles(a, b) -> float:
+    """Great-circle distance between two [longitude, latitude] points"""
+    lng1, lat1, lng2, lat2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(h))
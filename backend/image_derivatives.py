@@ -0,0 +1,63 @@
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps
+
+# Longest edge in pixels for each derivative size
+DERIVATIVE_SIZES = {
+    "thumb": 320,
+    "detail": 1024,
+    "full": 2048,
+}
+DERIVATIVE_FORMAT = "WEBP"
+DERIVATIVE_CONTENT_TYPE = "image/webp"
+DERIVATIVE_QUALITY = 80
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def generate_derivatives(data: bytes) -> Dict[str, bytes]:
+    """Resize an image into every derivative size (runs in a worker process)"""
+    with Image.open(io.BytesIO(data)) as source:
+        # Apply camera rotation before EXIF is dropped by re-encoding
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+        derivatives = {}
+        for name, max_edge in DERIVATIVE_SIZES.items():
+            resized = image.copy()
+            # thumbnail() only ever shrinks, so small uploads keep their size
+            resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            output = io.BytesIO()
+            resized.save(output, DERIVATIVE_FORMAT, quality=DERIVATIVE_QUALITY, method=4)
+            derivatives[name] = output.getvalue()
+        return derivatives
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        max_workers = int(os.environ.get('IMAGE_WORKERS', '2'))
+        # spawn keeps workers independent of the event loop and Mongo client threads
+        _executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def render_derivatives(data: bytes) -> Dict[str, bytes]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), generate_derivatives, data)
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,228 @@
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Declared indexes per collection; applied idempotently at startup and checked by `manage.py indexes`.
+# Listing and follow indexes end in _id so keyset pagination on (created_at, _id) needs no in-memory sort.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("created_at", DESCENDING)], name="created"),
+    ],
+    "listings": [
+        IndexModel(
+            [("is_active", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="active_created"
+        ),
+        IndexModel(
+            [("is_active", ASCENDING), ("category", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="active_category_created"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("is_active", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="user_active_created"
+        ),
+        IndexModel(
+            [("is_active", ASCENDING), ("seller_avg_rating", DESCENDING), ("_id", DESCENDING)],
+            name="active_seller_rating"
+        ),
+        IndexModel([("geo", GEOSPHERE), ("is_active", ASCENDING)], name="geo_active"),
+        # Listings kept out of timelines, merged into the following feed at read time
+        IndexModel(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="unfanned_user_created",
+            partialFilterExpression={"fanned_out": False, "is_active": True}
+        ),
+        # Only listings awaiting moderation, for the admin flagged filter
+        IndexModel(
+            [("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="flagged_created",
+            partialFilterExpression={"unreviewed_flag_count": {"$gt": 0}}
+        ),
+        # Weighted full-text index for search; $text queries must match is_active by equality
+        IndexModel(
+            [("is_active", ASCENDING), ("title", TEXT), ("breed", TEXT), ("egg_type", TEXT),
+             ("location", TEXT), ("description", TEXT)],
+            name="active_text",
+            weights={"title": 10, "breed": 5, "egg_type": 5, "location": 3, "description": 1},
+            default_language="english"
+        ),
+    ],
+    "ratings": [
+        IndexModel(
+            [("seller_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="seller_created"
+        ),
+        IndexModel(
+            [("seller_id", ASCENDING), ("buyer_id", ASCENDING), ("listing_id", ASCENDING)],
+            name="seller_buyer_listing"
+        ),
+    ],
+    "follows": [
+        IndexModel(
+            [("follower_id", ASCENDING), ("following_id", ASCENDING)],
+            name="follower_following",
+            unique=True
+        ),
+        IndexModel(
+            [("follower_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="follower_created"
+        ),
+        IndexModel(
+            [("following_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="following_created"
+        ),
+    ],
+    "messages": [
+        IndexModel([("sender_id", ASCENDING), ("created_at", DESCENDING)], name="sender_created"),
+        IndexModel([("receiver_id", ASCENDING), ("created_at", DESCENDING)], name="receiver_created"),
+        # conversation_id is the (listing_id, sorted participants) key maintained by send_message
+        IndexModel(
+            [("conversation_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="conversation_created"
+        ),
+    ],
+    "conversations": [
+        IndexModel([("participants", ASCENDING), ("last_message_time", DESCENDING)], name="participants_last_message"),
+    ],
+    "listing_flags": [
+        IndexModel([("listing_id", ASCENDING), ("flagger_id", ASCENDING)], name="listing_flagger"),
+        IndexModel([("reviewed", ASCENDING), ("created_at", DESCENDING)], name="reviewed_created"),
+    ],
+    "admin_actions": [
+        IndexModel([("listing_id", ASCENDING), ("created_at", DESCENDING)], name="listing_created"),
+    ],
+    "admin_notifications": [
+        # Queue order for both the unread filter and the full list (unread first)
+        IndexModel(
+            [("read", ASCENDING), ("priority_rank", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="read_priority_created"
+        ),
+    ],
+}
+
+_NEWEST = [("created_at", DESCENDING), ("_id", DESCENDING)]
+_SAMPLE_ID = "000000000000000000000000"
+
+# The query shape each endpoint runs, explained by `manage.py indexes` to catch plan regressions
+CANONICAL_QUERIES = [
+    {"endpoint": "get_listings", "collection": "listings",
+     "filter": {"is_active": True}, "sort": _NEWEST},
+    {"endpoint": "get_listings?category", "collection": "listings",
+     "filter": {"is_active": True, "category": "poultry"}, "sort": _NEWEST},
+    {"endpoint": "get_user_listings", "collection": "listings",
+     "filter": {"user_id": _SAMPLE_ID, "is_active": True}, "sort": _NEWEST},
+    {"endpoint": "get_following_feed", "collection": "listings",
+     "filter": {"user_id": {"$in": [_SAMPLE_ID]}, "is_active": True, "fanned_out": False}, "sort": _NEWEST},
+    {"endpoint": "advanced_search?sort_by=rating", "collection": "listings",
+     "filter": {"is_active": True}, "sort": [("seller_avg_rating", DESCENDING), ("_id", DESCENDING)]},
+    {"endpoint": "advanced_search?radius_miles", "collection": "listings",
+     "filter": {"is_active": True, "geo": {"$geoWithin": {"$centerSphere": [[-97.74, 30.27], 50 / 3963.2]}}}},
+    {"endpoint": "search_listings", "collection": "listings",
+     "filter": {"is_active": True, "$text": {"$search": "rhode island red"}}},
+    {"endpoint": "get_seller_ratings", "collection": "ratings",
+     "filter": {"seller_id": _SAMPLE_ID}, "sort": _NEWEST},
+    {"endpoint": "create_rating", "collection": "ratings",
+     "filter": {"seller_id": _SAMPLE_ID, "buyer_id": _SAMPLE_ID, "listing_id": _SAMPLE_ID}},
+    {"endpoint": "get_user_followers", "collection": "follows",
+     "filter": {"following_id": _SAMPLE_ID}, "sort": _NEWEST},
+    {"endpoint": "get_user_following", "collection": "follows",
+     "filter": {"follower_id": _SAMPLE_ID}, "sort": _NEWEST},
+    {"endpoint": "get_conversation_messages", "collection": "messages",
+     "filter": {"conversation_id": f"{_SAMPLE_ID}_{_SAMPLE_ID}_{_SAMPLE_ID}"}, "sort": _NEWEST},
+    {"endpoint": "follow_user", "collection": "follows",
+     "filter": {"follower_id": _SAMPLE_ID, "following_id": _SAMPLE_ID}},
+    {"endpoint": "get_user_conversations", "collection": "conversations",
+     "filter": {"participants": _SAMPLE_ID}, "sort": [("last_message_time", DESCENDING)]},
+    {"endpoint": "flag_listing", "collection": "listing_flags",
+     "filter": {"listing_id": _SAMPLE_ID, "flagger_id": _SAMPLE_ID}},
+    {"endpoint": "get_admin_listings?status=flagged", "collection": "listings",
+     "filter": {"unreviewed_flag_count": {"$gt": 0}}, "sort": _NEWEST},
+    {"endpoint": "get_admin_listings", "collection": "admin_actions",
+     "filter": {"listing_id": _SAMPLE_ID}, "sort": [("created_at", DESCENDING)]},
+    {"endpoint": "get_admin_notifications?unread_only", "collection": "admin_notifications",
+     "filter": {"read": False}, "sort": [("priority_rank", DESCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]},
+    {"endpoint": "get_admin_notifications", "collection": "admin_notifications",
+     "filter": {}, "sort": [("read", ASCENDING), ("priority_rank", DESCENDING), ("created_at", DESCENDING),
+                            ("_id", DESCENDING)]},
+    {"endpoint": "get_admin_stats", "collection": "users",
+     "filter": {"created_at": {"$gte": datetime(2024, 1, 1)}}},
+    {"endpoint": "login_user", "collection": "users",
+     "filter": {"email": "user@example.com"}},
+]
+
+
+async def ensure_indexes(db):
+    """Create every declared index; existing identical indexes are left untouched"""
+    for collection_name, models in INDEXES.items():
+        for model in models:
+            try:
+                await db[collection_name].create_indexes([model])
+            except OperationFailure as e:
+                # e.g. duplicate data blocking a unique index; keep serving and report it
+                logger.error(f"Could not create index {collection_name}.{model.document['name']}: {e}")
+
+
+async def index_report(db) -> Dict[str, dict]:
+    """Compare declared indexes with the server: missing, undeclared and never-used indexes"""
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        declared = {model.document["name"] for model in models}
+
+        usage = {}
+        try:
+            async for stats in collection.aggregate([{"$indexStats": {}}]):
+                usage[stats["name"]] = stats["accesses"]["ops"]
+        except OperationFailure:
+            pass  # $indexStats needs clusterMonitor privileges
+
+        report[collection_name] = {
+            "missing": sorted(declared - set(existing)),
+            "undeclared": sorted(set(existing) - declared - {"_id_"}),
+            "unused": sorted(name for name, ops in usage.items() if ops == 0 and name != "_id_"),
+        }
+    return report
+
+
+def _plan_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def explain_queries(db) -> List[dict]:
+    """Explain each canonical query and flag collection scans and in-memory sorts"""
+    results = []
+    for query in CANONICAL_QUERIES:
+        cursor = db[query["collection"]].find(query["filter"]).limit(20)
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        explanation = await cursor.explain()
+        stages = _plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+
+        problems = []
+        if "COLLSCAN" in stages:
+            problems.append("collection scan")
+        if "SORT" in stages:
+            problems.append("in-memory sort")
+        results.append({
+            "endpoint": query["endpoint"],
+            "collection": query["collection"],
+            "stages": stages,
+            "problems": problems,
+        })
+    return results
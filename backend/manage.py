@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Poultry Marketplace backend.
+Run from the backend directory, e.g. `python manage.py migrate-images`.
+"""
+
+import asyncio
+
+import typer
+from fastapi import HTTPException
+
+import server
+import timeline
+from indexes import ensure_indexes, explain_queries, index_report
+
+cli = typer.Typer(help="Poultry Marketplace maintenance commands")
+
+
+async def _migrate_images(batch_size: int) -> int:
+    migrated = 0
+    # Legacy listings keep base64 data inline; anything not starting with the image prefix needs moving
+    query = {"images": {"$elemMatch": {"$not": {"$regex": "^/api/images/"}}}}
+    async for listing in server.db.listings.find(query, {"images": 1}).batch_size(batch_size):
+        try:
+            image_refs = await server.store_listing_images(listing.get("images", []))
+        except HTTPException as e:
+            typer.echo(f"Skipping listing {listing['_id']}: {e.detail}")
+            continue
+        await server.db.listings.update_one({"_id": listing["_id"]}, {"$set": {"images": image_refs}})
+        migrated += 1
+    return migrated
+
+
+async def _generate_derivatives(batch_size: int) -> int:
+    processed = 0
+    query = {"images.0": {"$exists": True}, "image_variants": {"$exists": False}}
+    async for listing in server.db.listings.find(query, {"images": 1}).batch_size(batch_size):
+        await server.process_listing_images(listing["_id"], listing["images"])
+        processed += 1
+    return processed
+
+
+@cli.command("migrate-images")
+def migrate_images(batch_size: int = 50):
+    """Move inline base64 listing images into the blob store"""
+    migrated = asyncio.run(_migrate_images(batch_size))
+    typer.echo(f"Migrated images for {migrated} listings")
+
+
+@cli.command("generate-derivatives")
+def generate_derivatives(batch_size: int = 50):
+    """Generate thumbnail/detail/full derivatives for listings that lack them"""
+    processed = asyncio.run(_generate_derivatives(batch_size))
+    server.shutdown_executor()
+    typer.echo(f"Generated derivatives for {processed} listings")
+
+
+@cli.command("ensure-indexes")
+def ensure_indexes_command():
+    """Create every declared index"""
+    asyncio.run(ensure_indexes(server.db))
+    typer.echo("Indexes are up to date")
+
+
+async def _check_indexes():
+    return await index_report(server.db), await explain_queries(server.db)
+
+
+@cli.command("indexes")
+def check_indexes():
+    """Report missing/unused indexes and explain each endpoint's canonical query"""
+    report, plans = asyncio.run(_check_indexes())
+
+    for collection_name, status in report.items():
+        for kind in ("missing", "undeclared", "unused"):
+            if status[kind]:
+                typer.echo(f"{collection_name}: {kind} indexes: {', '.join(status[kind])}")
+
+    failed = False
+    for plan in plans:
+        stages = " > ".join(plan["stages"])
+        if plan["problems"]:
+            failed = True
+            typer.echo(f"FAIL {plan['endpoint']} ({plan['collection']}): {', '.join(plan['problems'])} [{stages}]")
+        else:
+            typer.echo(f"ok   {plan['endpoint']} ({plan['collection']}): [{stages}]")
+
+    missing = any(status["missing"] for status in report.values())
+    # Non-zero exit lets CI block a deploy on plan regressions
+    raise typer.Exit(code=1 if failed or missing else 0)
+
+
+@cli.command("rebuild-seller-stats")
+def rebuild_seller_stats():
+    """Recompute seller rating stats from raw ratings and re-denormalize them onto listings"""
+    sellers = asyncio.run(server.rebuild_seller_stats())
+    typer.echo(f"Rebuilt rating stats for {sellers} sellers")
+
+
+@cli.command("rebuild-follow-counts")
+def rebuild_follow_counts():
+    """Remove duplicate follows and recompute follower/following counts on user documents"""
+    users = asyncio.run(server.rebuild_follow_counts())
+    typer.echo(f"Rebuilt follow counts for {users} users")
+
+
+@cli.command("rebuild-flag-counts")
+def rebuild_flag_counts():
+    """Recompute unreviewed flag counts on listings from raw flags"""
+    listings = asyncio.run(server.rebuild_flag_counts())
+    typer.echo(f"{listings} listings have unreviewed flags")
+
+
+@cli.command("backfill-notification-ranks")
+def backfill_notification_ranks():
+    """Add numeric priority ranks to admin notifications created before they were stored"""
+    updated = asyncio.run(server.backfill_notification_ranks())
+    typer.echo(f"Ranked {updated} notifications")
+
+
+@cli.command("rebuild-timelines")
+def rebuild_timelines():
+    """Rebuild following-feed timelines from follows and recent listings"""
+    follows = asyncio.run(timeline.rebuild_timelines(server.db))
+    typer.echo(f"Rebuilt timelines from {follows} follows")
+
+
+async def _geocode(batch_size: int):
+    counts = {}
+    for collection_name in ("users", "listings"):
+        collection = server.db[collection_name]
+        resolved = 0
+        # Points stored from state centroids are too coarse for radius queries; drop them and retry
+        await collection.update_many(
+            {"geo": {"$exists": True}, "geo_precision": {"$nin": list(server.GEO_PRECISIONS)}},
+            {"$unset": {"geo": ""}}
+        )
+        query = {"geo": {"$exists": False}, "location": {"$type": "string"}}
+        async for doc in collection.find(query, {"location": 1}).batch_size(batch_size):
+            fields = server.location_fields(doc["location"])
+            if fields:
+                await collection.update_one({"_id": doc["_id"]}, {"$set": fields})
+            if "geo" in fields:
+                resolved += 1
+        counts[collection_name] = resolved
+    return counts
+
+
+@cli.command("geocode")
+def geocode(batch_size: int = 200):
+    """Resolve geo points for users and listings that don't have one yet"""
+    counts = asyncio.run(_geocode(batch_size))
+    for collection_name, resolved in counts.items():
+        typer.echo(f"Geocoded {resolved} {collection_name}")
+
+
+@cli.command("rebuild-conversations")
+def rebuild_conversations():
+    """Recompute conversation summaries and unread counters from raw messages, backfilling thread keys"""
+    rebuilt = asyncio.run(server.rebuild_conversations())
+    typer.echo(f"Rebuilt {rebuilt} conversations")
+
+
+@cli.command("rebuild-unread-counters")
+def rebuild_unread_counters():
+    """Recompute per-user unread message counters from raw messages"""
+    users = asyncio.run(server.rebuild_unread_counters())
+    typer.echo(f"Rebuilt unread counters for {users} users")
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,174 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from bson import ObjectId
+
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, ObjectId):
+        return {"oid": str(value)}
+    return value
+
+
+def _decode_value(value: Any):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "oid" in value:
+            return ObjectId(value["oid"])
+    return value
+
+
+def encode_cursor(sort_field: str, doc: dict) -> str:
+    """Build an opaque cursor pointing just after doc in (sort_field, _id) order"""
+    payload = {"f": sort_field, "v": _encode_value(doc.get(sort_field)), "id": str(doc["_id"])}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def decode_cursor(token: str, sort_field: str) -> Tuple[Any, ObjectId]:
+    """Return the (sort value, _id) a cursor points at; raises InvalidCursor if invalid"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, doc_id = _decode_value(payload["v"]), ObjectId(payload["id"])
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    # A cursor from one sort order is meaningless under another
+    if payload.get("f") != sort_field:
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return value, doc_id
+
+
+def keyset_filter(sort_field: str, direction: int, value: Any, doc_id: ObjectId) -> dict:
+    """Match documents strictly after (value, doc_id) in (sort_field, _id) order"""
+    # Missing/null sort values sort lowest in Mongo, so they come last in descending order
+    if direction < 0:
+        if value is None:
+            return {sort_field: None, "_id": {"$lt": doc_id}}
+        return {"$or": [
+            {sort_field: {"$lt": value}},
+            {sort_field: value, "_id": {"$lt": doc_id}},
+            {sort_field: None}
+        ]}
+    if value is None:
+        return {"$or": [
+            {sort_field: None, "_id": {"$gt": doc_id}},
+            {sort_field: {"$ne": None}}
+        ]}
+    return {"$or": [
+        {sort_field: {"$gt": value}},
+        {sort_field: value, "_id": {"$gt": doc_id}}
+    ]}
+
+
+def keyset_sort(sort_field: str, direction: int) -> List[Tuple[str, int]]:
+    """Sort with _id as a tie-breaker so page boundaries are stable"""
+    return [(sort_field, direction), ("_id", direction)]
+
+
+def apply_cursor(query: dict, cursor: Optional[str], sort_field: str, direction: int) -> dict:
+    """Restrict query to documents after cursor; an empty cursor starts from the first page"""
+    if not cursor:
+        return query
+    value, doc_id = decode_cursor(cursor, sort_field)
+    return {"$and": [query, keyset_filter(sort_field, direction, value, doc_id)]}
+
+
+async def fetch_page(collection, query: dict, sort_field: str, direction: int, limit: int,
+                     skip: int = 0, cursor: Optional[str] = None, projection: Optional[dict] = None):
+    """Fetch a page by skip, or by keyset when cursor is not None; returns (docs, next_cursor)"""
+    sort = keyset_sort(sort_field, direction)
+    if cursor is None:
+        docs = await collection.find(query, projection).sort(sort).skip(skip).limit(limit).to_list(length=limit)
+        return docs, None
+
+    if projection and any(value for name, value in projection.items() if name != "_id"):
+        # The cursor is built from the sort field, so an inclusion projection has to return it
+        projection = {**projection, sort_field: 1}
+    query = apply_cursor(query, cursor, sort_field, direction)
+    # Fetch one extra document to know whether another page exists
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+    return split_page(docs, limit, sort_field)
+
+
+def split_page(docs: list, limit: int, sort_field: str):
+    """Trim a limit + 1 fetch to limit docs and build the cursor for the next page"""
+    if len(docs) > limit:
+        return docs[:limit], encode_cursor(sort_field, docs[limit - 1])
+    return docs, None
+
+
+def encode_compound_cursor(sort: List[Tuple[str, int]], doc: dict) -> str:
+    """Cursor for a multi-field sort; sort lists (field, direction) pairs without the _id tie-breaker"""
+    payload = {
+        "f": [field for field, _ in sort],
+        "v": [_encode_value(doc.get(field)) for field, _ in sort],
+        "id": str(doc["_id"])
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_compound_cursor(token: str, sort: List[Tuple[str, int]]) -> Tuple[List[Any], ObjectId]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values, doc_id = [_decode_value(value) for value in payload["v"]], ObjectId(payload["id"])
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+    if payload.get("f") != [field for field, _ in sort] or len(values) != len(sort):
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return values, doc_id
+
+
+def compound_keyset_filter(sort: List[Tuple[str, int]], values: List[Any], doc_id: ObjectId) -> dict:
+    """Match documents strictly after (values..., doc_id); null sort values order lowest, as in Mongo"""
+    keys = sort + [("_id", sort[-1][1])]
+    values = values + [doc_id]
+    clauses = []
+    for index, (field, direction) in enumerate(keys):
+        prefix = {name: value for (name, _), value in zip(keys[:index], values[:index])}
+        value = values[index]
+        if direction < 0:
+            if value is None:
+                continue  # Nothing sorts below null
+            after = [{field: {"$lt": value}}]
+            if index < len(sort):
+                after.append({field: None})  # Nulls follow every value in descending order
+        else:
+            after = [{field: {"$ne": None}}] if value is None else [{field: {"$gt": value}}]
+        clauses += [{**prefix, **condition} for condition in after]
+    return {"$or": clauses}
+
+
+async def fetch_compound_page(collection, query: dict, sort: List[Tuple[str, int]], limit: int,
+                              skip: int = 0, cursor: Optional[str] = None):
+    """fetch_page for a multi-field sort; returns (docs, next_cursor)"""
+    full_sort = sort + [("_id", sort[-1][1])]
+    if cursor is None:
+        docs = await collection.find(query).sort(full_sort).skip(skip).limit(limit).to_list(length=limit)
+        return docs, None
+
+    if cursor:
+        values, doc_id = decode_compound_cursor(cursor, sort)
+        query = {"$and": [query, compound_keyset_filter(sort, values, doc_id)]}
+    docs = await collection.find(query).sort(full_sort).limit(limit + 1).to_list(length=limit + 1)
+    if len(docs) > limit:
+        return docs[:limit], encode_compound_cursor(sort, docs[limit - 1])
+    return docs, None
+
+
+def page_response(items: list, cursor: Optional[str], next_cursor: Optional[str]):
+    """Plain list in skip mode, items/next_cursor envelope in cursor mode"""
+    if cursor is None:
+        return items
+    return {"items": items, "next_cursor": next_cursor}
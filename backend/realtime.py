@@ -0,0 +1,118 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Set
+
+from backends import load_backend
+
+
+ADMIN_CHANNEL = "admin"
+
+
+def user_channel(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """One connection's bounded inbox; overflowing it marks the connection as too slow"""
+
+    def __init__(self, channel: str, max_queue: int):
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = asyncio.Event()
+
+    def deliver(self, event: str):
+        if self.overflowed.is_set():
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Never block publishers on a slow client; it reconnects and resyncs over REST
+            self.overflowed.set()
+
+    async def next_event(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next queued event, or None once the subscription has overflowed; raises TimeoutError after timeout"""
+        get = asyncio.ensure_future(self.queue.get())
+        overflow = asyncio.ensure_future(self.overflowed.wait())
+        done, pending = await asyncio.wait({get, overflow}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if get in done:
+            return get.result()
+        if overflow in done:
+            return None
+        raise asyncio.TimeoutError()
+
+
+class Broker(ABC):
+    """Pub/sub for pushing events to open connections; publishers pass already-encoded JSON.
+
+    InMemoryBroker delivers only to sockets held by the publishing worker, so multi-worker
+    deployments should point REALTIME_BROKER at a cross-process implementation.
+    """
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> Subscription:
+        ...
+
+    @abstractmethod
+    async def unsubscribe(self, subscription: Subscription):
+        ...
+
+    @abstractmethod
+    async def publish(self, channel: str, event: str):
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryBroker(Broker):
+    """Fans events out to subscriptions held by this process"""
+
+    def __init__(self, max_queue: int):
+        super().__init__(max_queue)
+        self.channels: Dict[str, Set[Subscription]] = {}
+        self.published = 0
+        self.overflows = 0
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = Subscription(channel, self.max_queue)
+        self.channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        subscriptions = self.channels.get(subscription.channel)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.channels[subscription.channel]
+
+    async def publish(self, channel: str, event: str):
+        self.published += 1
+        for subscription in list(self.channels.get(channel, ())):
+            was_overflowed = subscription.overflowed.is_set()
+            subscription.deliver(event)
+            if subscription.overflowed.is_set() and not was_overflowed:
+                self.overflows += 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "channels": len(self.channels),
+            "connections": sum(len(subscriptions) for subscriptions in self.channels.values()),
+            "published": self.published,
+            "overflows": self.overflows,
+        }
+
+
+def create_broker() -> Broker:
+    """Build the broker named by REALTIME_BROKER: memory, or module:ClassName"""
+    backend = os.environ.get('REALTIME_BROKER', 'memory')
+    max_queue = int(os.environ.get('REALTIME_QUEUE_SIZE', '100'))
+    if backend == "memory":
+        return InMemoryBroker(max_queue)
+    return load_backend(backend, 'REALTIME_BROKER', max_queue)
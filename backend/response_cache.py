@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set
+
+from backends import load_backend
+
+
+def cache_key(endpoint: str, **params) -> str:
+    """Normalize endpoint parameters into a stable cache key"""
+    normalized = {name: value for name, value in params.items() if value is not None}
+    return f"{endpoint}?{json.dumps(normalized, sort_keys=True, default=str)}"
+
+
+class CacheBackend(ABC):
+    """Interface for response caches; values are encoded response bodies.
+
+    The in-process backend only sees invalidations from its own worker. A shared backend
+    (e.g. Redis) can implement this interface and be selected with RESPONSE_CACHE_BACKEND.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()):
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]):
+        ...
+
+    @abstractmethod
+    async def clear(self):
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class NullCacheBackend(CacheBackend):
+    """Disables caching while keeping call sites unchanged"""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()):
+        pass
+
+    async def invalidate_tags(self, tags: Iterable[str]):
+        pass
+
+    async def clear(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Bounded LRU + TTL cache with tag-based invalidation"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at, tags)
+        self.tag_index: Dict[str, Set[str]] = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = asyncio.Lock()
+
+    def _remove(self, key: str):
+        value, _, tags = self.entries.pop(key)
+        self.size -= len(key) + len(value)
+        for tag in tags:
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_index[tag]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        async with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()):
+        entry_size = len(key) + len(value)
+        if entry_size > self.max_bytes:
+            return  # Would evict everything else for a single response
+        tags = tuple(tags)
+        async with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            while self.entries and self.size + entry_size > self.max_bytes:
+                oldest_key = next(iter(self.entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+            self.entries[key] = (value, time.monotonic() + ttl, tags)
+            self.size += entry_size
+            for tag in tags:
+                self.tag_index.setdefault(tag, set()).add(key)
+
+    async def invalidate_tags(self, tags: Iterable[str]):
+        async with self.lock:
+            for tag in tags:
+                for key in list(self.tag_index.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    async def clear(self):
+        async with self.lock:
+            self.entries.clear()
+            self.tag_index.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self.entries),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def create_cache_backend() -> CacheBackend:
+    """Build the backend named by RESPONSE_CACHE_BACKEND: memory, none, or module:ClassName"""
+    backend = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    if backend == "memory":
+        return MemoryCacheBackend(int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', str(32 * 1024 * 1024))))
+    if backend == "none":
+        return NullCacheBackend()
+    return load_backend(backend, 'RESPONSE_CACHE_BACKEND')
@@ -1,18 +1,42 @@
-from fastapi import FastAPI, APIRouter, HTTPException, status
-from fastapi.security import HTTPBearer
+from fastapi import FastAPI, APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+import csv
+import io
+import json
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import uuid
+import hashlib
 from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import bcrypt
 import jwt
+from blob_store import ALLOWED_IMAGE_TYPES, create_blob_store, decode_image, digest_from_url, image_url, DIGEST_RE
+from image_derivatives import DERIVATIVE_CONTENT_TYPE, render_derivatives, shutdown_executor
+from gazetteer import METERS_PER_MILE, distance_miles, miles_to_radians, resolve_location
+from indexes import ensure_indexes
+from response_cache import cache_key, create_cache_backend
+from batch_loader import DocumentLoader, GroupLoader
+from pagination import (
+    InvalidCursor, apply_cursor, decode_cursor, fetch_compound_page, fetch_page, keyset_filter, page_response,
+    split_page
+)
+from realtime import ADMIN_CHANNEL, create_broker, user_channel
+from timeline import (
+    backfill_timeline, direct_sellers, fan_out_listing, fans_out, feed_refs, remove_from_timeline
+)
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -22,8 +46,57 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Content-addressed image storage (GridFS or local disk, see IMAGE_STORE_BACKEND)
+blob_store = create_blob_store(db)
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Cache-Control policies for conditional GET routes
+LISTING_CACHE_CONTROL = "public, max-age=60"
+USER_LISTINGS_CACHE_CONTROL = "public, no-cache"
+PROFILE_CACHE_CONTROL = "private, no-cache"  # includes contact details
+RATING_SUMMARY_CACHE_CONTROL = "public, max-age=300"
+
+# Response cache for hot listing reads (see RESPONSE_CACHE_BACKEND)
+response_cache = create_cache_backend()
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', '30'))
+
+# Text searches sorted by distance rank at most this many of the best text matches
+TEXT_DISTANCE_CANDIDATES = 1000
+# Listings sharing a location centroid tie on distance; at most this many are ordered at a page edge
+GEO_TIE_LIMIT = 1000
+GEO_DISTANCE_EPSILON = 0.01  # meters, absorbs float rounding between miles and meters
+
+# Upper bound on ids accepted by batch lookup endpoints
+MAX_BATCH_IDS = 100
+# Following sets up to this size are cached whole for follow-status checks
+FOLLOWING_SET_CACHE_MAX = 1000
+
+# Admin dashboard counts, refreshed in the background (0 computes them on every request)
+ADMIN_STATS_REFRESH_SECONDS = float(os.environ.get('ADMIN_STATS_REFRESH_SECONDS', '60'))
+admin_stats_snapshot: Optional[dict] = None
+
+# Realtime pub/sub for WebSocket and SSE pushes (see REALTIME_BROKER)
+broker = create_broker()
+WS_AUTH_TIMEOUT_SECONDS = 10  # how long a socket may take to send its token frame
+SSE_RETRY_MS = 5000
+SSE_KEEPALIVE_SECONDS = 15
+SSE_REPLAY_LIMIT = 100  # notifications per replay query
+SSE_REPLAY_MAX = 1000  # beyond this the stream sends a resync event instead of replaying
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Declared indexes are created idempotently; disable with ENSURE_INDEXES=false
+    if os.environ.get('ENSURE_INDEXES', 'true').lower() == 'true':
+        await ensure_indexes(db)
+    stats_task = asyncio.create_task(refresh_admin_stats()) if ADMIN_STATS_REFRESH_SECONDS > 0 else None
+    yield
+    if stats_task:
+        stats_task.cancel()
+    client.close()
+    shutdown_executor()
+
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -70,8 +143,13 @@ class Listing(BaseModel):
     description: str
     category: str  # "poultry", "coop", "cage", "eggs"
     price: float
-    images: List[str] = []  # base64 encoded images
+    images: List[str] = []  # /api/images/{hash} references
+    thumbnail: Optional[str] = None  # grid-size derivative of the first image
+    image_variants: List[dict] = []  # per image: {"thumb": ref, "detail": ref, "full": ref}
     location: str
+    seller_avg_rating: float = 0.0  # denormalized from seller_stats
+    distance_miles: Optional[float] = None  # only set by distance-sorted searches
+    seller: Optional[dict] = None  # only set with embed=seller
     # Poultry specific fields
     breed: Optional[str] = None
     age: Optional[str] = None
@@ -93,12 +171,27 @@ class Listing(BaseModel):
     class Config:
         populate_by_name = True
 
+class ListingSummary(BaseModel):
+    id: Optional[str] = Field(default=None, alias="_id")
+    user_id: str
+    title: str
+    category: str
+    price: float
+    location: str
+    thumbnail: Optional[str] = None
+    created_at: Optional[datetime] = None
+    distance_miles: Optional[float] = None
+    seller: Optional[dict] = None
+    
+    class Config:
+        populate_by_name = True
+
 class ListingCreate(BaseModel):
     title: str
     description: str
     category: str
     price: float
-    images: List[str] = []
+    images: List[str] = []  # base64 data URLs or existing /api/images/{hash} references
     location: str
     breed: Optional[str] = None
     age: Optional[str] = None
@@ -154,6 +247,9 @@ class RatingSummary(BaseModel):
     total_ratings: int
     rating_breakdown: dict  # {5: count, 4: count, etc.}
 
+class IdBatch(BaseModel):
+    ids: List[str]
+
 class AdvancedSearchParams(BaseModel):
     query: Optional[str] = None
     category: Optional[str] = None
@@ -170,10 +266,13 @@ class AdvancedSearchParams(BaseModel):
     age_range: Optional[str] = None
     # General filters
     min_rating: Optional[float] = None
-    sort_by: Optional[str] = "created_at"  # created_at, price, rating, distance
+    sort_by: Optional[str] = "created_at"  # created_at, price, rating, distance, relevance
     sort_order: Optional[str] = "desc"  # asc, desc
+    view: str = "full"  # full, summary
+    fields: Optional[str] = None  # comma-separated listing fields, overrides view
     limit: int = 20
     skip: int = 0
+    cursor: Optional[str] = None  # "" for the first page, then next_cursor; switches to keyset paging
 
 class Follow(BaseModel):
     id: Optional[str] = Field(default=None, alias="_id")
@@ -265,6 +364,956 @@ def create_access_token(user_id: str) -> str:
     payload = {"user_id": user_id, "exp": datetime.utcnow().timestamp() + 86400}  # 24 hours
     return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
 
+def decode_access_token(token: Optional[str]) -> Optional[str]:
+    """user_id from a create_access_token token; None if missing, invalid or expired"""
+    if not token:
+        return None
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+    except jwt.PyJWTError:
+        return None
+    return payload.get("user_id")
+
+def authorize_user(user_id: str, credentials: HTTPAuthorizationCredentials):
+    """Reject a request whose bearer token does not belong to user_id"""
+    token_user_id = decode_access_token(credentials.credentials)
+    if not token_user_id:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if token_user_id != user_id:
+        raise HTTPException(status_code=403, detail="Not allowed to access another user's messages")
+
+# === Response Cache Helpers ===
+
+def listings_cache_tag(category: Optional[str] = None) -> str:
+    return f"listings:category:{category}" if category else "listings:all"
+
+def listing_cache_tag(listing_id: str) -> str:
+    return f"listing:{listing_id}"
+
+def following_cache_tag(user_id: str) -> str:
+    return f"following:{user_id}"
+
+async def cached_body(key: str, tags: List[str], load) -> Tuple[bytes, Optional[str]]:
+    """Return (encoded JSON body, ETag) from the response cache, building them with load() on a miss"""
+    cached = await response_cache.get(key)
+    if cached is not None:
+        etag, _, body = cached.partition(b"\n")
+        return body, etag.decode() or None
+    
+    payload, etag = await load()
+    body = JSONResponse(jsonable_encoder(payload)).body
+    # The ETag is stored in front of the body so hits can answer conditional requests too
+    await response_cache.set(key, (etag or "").encode() + b"\n" + body, RESPONSE_CACHE_TTL, tags)
+    return body, etag
+
+async def invalidate_listing_cache(listing_id: Optional[str], category: Optional[str]):
+    """Drop cached responses that could contain this listing"""
+    tags = [listings_cache_tag(), listings_cache_tag(category)]
+    if listing_id:
+        tags.append(listing_cache_tag(listing_id))
+    await response_cache.invalidate_tags(tags)
+
+async def invalidate_seller_cache(seller_id: str):
+    """Drop cached responses showing any of a seller's listings, which carry the seller's rating"""
+    tags = {listings_cache_tag()}
+    async for listing in db.listings.find({"user_id": seller_id}, {"category": 1}):
+        tags.add(listings_cache_tag(listing.get("category")))
+        tags.add(listing_cache_tag(str(listing["_id"])))
+    await response_cache.invalidate_tags(tags)
+
+# === Conditional GET Helpers ===
+
+def compute_etag(*parts) -> str:
+    """Strong ETag from the version markers of the documents behind a response"""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:24]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # If-None-Match uses weak comparison, so W/ prefixes still match
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def conditional_json(request: Request, body: bytes, etag: Optional[str], cache_control: str) -> Response:
+    """304 if the client already has this representation, otherwise the encoded body"""
+    if etag and etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+    headers = {"Cache-Control": cache_control}
+    if etag:
+        headers["ETag"] = etag
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def listing_etag(listing: dict) -> str:
+    return compute_etag("listing", listing["_id"], listing.get("version", 0), listing.get("updated_at"))
+
+def seller_stats_marker(stats: Optional[dict]) -> tuple:
+    return (stats["count"], stats.get("updated_at")) if stats else (0, None)
+
+# === Seller Rating Stats ===
+
+def seller_average(stats: Optional[dict]) -> float:
+    if not stats or not stats.get("count"):
+        return 0.0
+    return round(stats["sum"] / stats["count"], 2)
+
+async def get_seller_stats(seller_id: str) -> Optional[dict]:
+    return await db.seller_stats.find_one({"_id": seller_id})
+
+def user_profile(user: dict, stats: Optional[dict]) -> dict:
+    """Public profile document: the user without credentials plus their seller rating"""
+    user = serialize_object_id(user)
+    user.pop('password', None)
+    user.pop('has_unfanned_listings', None)  # timeline bookkeeping
+    summary = seller_rating_summary(user["_id"], stats)
+    user["seller_rating"] = {
+        "average_rating": summary.average_rating,
+        "total_ratings": summary.total_ratings
+    }
+    return user
+
+def batch_ids(batch: IdBatch) -> List[str]:
+    """Deduplicated ids from a batch request, rejecting oversized batches"""
+    ids = list(dict.fromkeys(batch.ids))
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_IDS} ids per request")
+    return ids
+
+async def seller_stats_batch(seller_ids: List[str]) -> Dict[str, dict]:
+    stats = await db.seller_stats.find({"_id": {"$in": seller_ids}}).to_list(length=len(seller_ids))
+    return {doc["_id"]: doc for doc in stats}
+
+async def user_profiles_batch(user_ids: List[str]) -> Dict[str, dict]:
+    """Profiles keyed by user id with one query per collection; unknown or invalid ids are omitted"""
+    object_ids = [ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)]
+    users, stats = await asyncio.gather(
+        db.users.find({"_id": {"$in": object_ids}}, {"password": 0}).to_list(length=len(object_ids)),
+        seller_stats_batch(user_ids)
+    )
+    return {str(user["_id"]): user_profile(user, stats.get(str(user["_id"]))) for user in users}
+
+async def embed_sellers(items: list) -> list:
+    """Attach each listing's seller profile (as returned by /users/batch) under `seller`"""
+    def seller_id(item):
+        return item.get("user_id") if isinstance(item, dict) else item.user_id
+    
+    profiles = await user_profiles_batch(list({seller_id(item) for item in items if seller_id(item)}))
+    for item in items:
+        profile = profiles.get(seller_id(item))
+        if isinstance(item, dict):
+            item["seller"] = profile
+        else:
+            item.seller = profile
+    return items
+
+def seller_rating_summary(seller_id: str, stats: Optional[dict]) -> RatingSummary:
+    """Build a rating summary from a seller_stats document (None means no ratings yet)"""
+    histogram = (stats or {}).get("histogram", {})
+    count = (stats or {}).get("count", 0)
+    return RatingSummary(
+        seller_id=seller_id,
+        average_rating=round(stats["sum"] / count, 1) if count else 0.0,
+        total_ratings=count,
+        rating_breakdown={rating: histogram.get(str(rating), 0) for rating in (5, 4, 3, 2, 1)}
+    )
+
+async def propagate_seller_rating(seller_id: str, stats: dict):
+    """Copy a seller's average onto their listings for rating sorts and filters"""
+    # Only overwrite listings holding an older snapshot so concurrent ratings can't regress the value
+    result = await db.listings.update_many(
+        {"user_id": seller_id, "$or": [
+            {"seller_rating_count": {"$lt": stats["count"]}},
+            {"seller_rating_count": {"$exists": False}}
+        ]},
+        {
+            "$set": {"seller_avg_rating": seller_average(stats), "seller_rating_count": stats["count"]},
+            "$inc": {"version": 1}
+        }
+    )
+    if result.modified_count:
+        await invalidate_seller_cache(seller_id)
+
+async def record_seller_rating(seller_id: str, rating: int):
+    """Fold a new rating into the seller's running sum, count and histogram"""
+    stats = await db.seller_stats.find_one_and_update(
+        {"_id": seller_id},
+        {
+            "$inc": {"sum": rating, "count": 1, f"histogram.{rating}": 1},
+            "$set": {"updated_at": datetime.utcnow()}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    await propagate_seller_rating(seller_id, stats)
+
+async def rebuild_seller_stats() -> int:
+    """Recompute every seller_stats document from the raw ratings"""
+    pipeline = [
+        {"$group": {"_id": {"seller_id": "$seller_id", "rating": "$rating"}, "count": {"$sum": 1}}}
+    ]
+    rebuilt = {}
+    async for group in db.ratings.aggregate(pipeline):
+        seller_id, rating = group["_id"]["seller_id"], group["_id"]["rating"]
+        stats = rebuilt.setdefault(seller_id, {"sum": 0, "count": 0, "histogram": {}})
+        stats["sum"] += rating * group["count"]
+        stats["count"] += group["count"]
+        stats["histogram"][str(rating)] = group["count"]
+    
+    for seller_id, stats in rebuilt.items():
+        stats["updated_at"] = datetime.utcnow()
+        await db.seller_stats.replace_one({"_id": seller_id}, stats, upsert=True)
+        await db.listings.update_many(
+            {"user_id": seller_id},
+            {
+                "$set": {"seller_avg_rating": seller_average(stats), "seller_rating_count": stats["count"]},
+                "$inc": {"version": 1}
+            }
+        )
+    
+    # Sellers without ratings
+    await db.seller_stats.delete_many({"_id": {"$nin": list(rebuilt)}})
+    await db.listings.update_many(
+        {"user_id": {"$nin": list(rebuilt)}},
+        {"$set": {"seller_avg_rating": 0.0, "seller_rating_count": 0}, "$inc": {"version": 1}}
+    )
+    # Every listing was rewritten, so no cached listing response is current
+    await response_cache.clear()
+    return len(rebuilt)
+
+# === Location Helpers ===
+
+# Precisions accurate enough to store as geo and use for radius and distance searches
+GEO_PRECISIONS = ("zip", "city")
+
+def location_fields(location: str) -> dict:
+    """GeoJSON point for a location string, resolved offline from the bundled gazetteer"""
+    resolved = resolve_location(location)
+    if not resolved:
+        return {}
+    point, precision = resolved
+    if precision not in GEO_PRECISIONS:
+        # A state centroid can be hundreds of miles off, so it never answers radius queries
+        return {"geo_precision": precision}
+    return {"geo": point, "geo_precision": precision}
+
+async def fetch_nearby_page(
+    query: dict,
+    origin: dict,
+    radius_miles: Optional[float],
+    limit: int,
+    skip: int,
+    cursor: Optional[str],
+    projection: Optional[dict]
+):
+    """Fetch listings nearest to origin first using $geoNear on the 2dsphere index"""
+    geo_near = {
+        "near": origin,
+        "key": "geo",
+        "spherical": True,
+        "query": query,
+        "distanceField": "distance_miles",
+        "distanceMultiplier": 1 / METERS_PER_MILE
+    }
+    if radius_miles:
+        geo_near["maxDistance"] = radius_miles * METERS_PER_MILE
+    after = decode_cursor(cursor, "distance_miles") if cursor else None
+    if after:
+        # Resume the index scan at the cursor's distance instead of re-reading nearer listings
+        geo_near["minDistance"] = max(after[0] * METERS_PER_MILE - GEO_DISTANCE_EPSILON, 0)
+    
+    # $geoNear already emits nearest first; only the tie group at the window edge needs ordering by _id
+    window = limit + 1 if cursor is not None else skip + limit
+    listings = await geo_near_window(geo_near, after, window, projection)
+    if len(listings) == window:
+        edge = listings[-1]["distance_miles"] * METERS_PER_MILE
+        ties = await geo_near_window({
+            **geo_near,
+            "minDistance": max(edge - GEO_DISTANCE_EPSILON, 0),
+            "maxDistance": edge + GEO_DISTANCE_EPSILON
+        }, after, GEO_TIE_LIMIT, projection)
+        tied_ids = {listing["_id"] for listing in ties}
+        listings = [listing for listing in listings if listing["_id"] not in tied_ids] + ties
+    listings.sort(key=lambda listing: (listing["distance_miles"], listing["_id"]))
+    
+    if cursor is None:
+        return listings[skip:skip + limit], None
+    return split_page(listings[:limit + 1], limit, "distance_miles")
+
+async def geo_near_window(geo_near: dict, after: Optional[tuple], limit: int, projection: Optional[dict]):
+    """First limit listings in $geoNear order, strictly after an optional (distance, _id) position"""
+    pipeline = [{"$geoNear": geo_near}]
+    if after:
+        pipeline.append({"$match": keyset_filter("distance_miles", 1, *after)})
+    pipeline.append({"$limit": limit})
+    if projection:
+        pipeline.append({"$project": aggregation_projection({**projection, "distance_miles": 1})})
+    return await db.listings.aggregate(pipeline).to_list(length=limit)
+
+async def fetch_text_nearby_page(
+    query: dict,
+    origin: dict,
+    radius_miles: Optional[float],
+    limit: int,
+    skip: int,
+    cursor: Optional[str],
+    projection: Optional[dict]
+):
+    """Nearest-first page of $text matches; $geoNear can't take $text, so distances are computed here"""
+    if cursor is not None:
+        raise HTTPException(status_code=400, detail="Cursor pagination is not supported for text searches sorted by distance")
+    if radius_miles:
+        query = {**query, "geo": {"$geoWithin": {
+            "$centerSphere": [origin["coordinates"], miles_to_radians(radius_miles)]
+        }}}
+    else:
+        query = {**query, "geo": {"$exists": True}}
+    
+    # Rank within the most relevant matches so the in-memory sort stays bounded
+    fetch_projection = {**(projection or {}), "score": {"$meta": "textScore"}}
+    if projection:
+        fetch_projection["geo"] = 1
+    candidates = await db.listings.find(query, fetch_projection).sort(
+        [("score", {"$meta": "textScore"})]
+    ).limit(TEXT_DISTANCE_CANDIDATES).to_list(length=TEXT_DISTANCE_CANDIDATES)
+    for listing in candidates:
+        listing["distance_miles"] = distance_miles(origin["coordinates"], listing["geo"]["coordinates"])
+        listing.pop("score", None)
+        if projection and "geo" not in projection:
+            listing.pop("geo")
+    candidates.sort(key=lambda listing: (listing["distance_miles"], listing["_id"]))
+    return candidates[skip:skip + limit], None
+
+# === Conversation Helpers ===
+
+def conversation_key(listing_id: str, user_a: str, user_b: str) -> str:
+    first, second = sorted([user_a, user_b])
+    return f"{listing_id}_{first}_{second}"
+
+def conversation_other_user(conversation: dict, user_id: str) -> str:
+    others = [participant for participant in conversation["participants"] if participant != user_id]
+    return others[0] if others else user_id
+
+async def describe_conversation(conversation_id: str, listing_id: str, participants: List[str]):
+    """Denormalize the listing title and participant names onto a new conversation"""
+    names = {}
+    listing = None
+    try:
+        listing = await db.listings.find_one({"_id": ObjectId(listing_id)}, {"title": 1})
+        async for user in db.users.find(
+            {"_id": {"$in": [ObjectId(participant) for participant in participants]}}, {"name": 1}
+        ):
+            names[str(user["_id"])] = user["name"]
+    except Exception:
+        pass  # Invalid ids fall back to "Unknown" labels
+    await db.conversations.update_one(
+        {"_id": conversation_id},
+        {"$set": {"listing_title": listing["title"] if listing else None, "participant_names": names}}
+    )
+
+async def record_conversation_message(message: dict):
+    """Fold a sent message into its conversation: last message and receiver's unread counter"""
+    participants = sorted([message["sender_id"], message["receiver_id"]])
+    conversation_id = conversation_key(message["listing_id"], *participants)
+    result = await db.conversations.update_one(
+        {"_id": conversation_id},
+        {
+            "$set": {
+                "last_message": message["content"],
+                "last_message_time": message["created_at"],
+                "last_sender_id": message["sender_id"]
+            },
+            "$inc": {f"unread.{message['receiver_id']}": 1},
+            "$setOnInsert": {"listing_id": message["listing_id"], "participants": participants}
+        },
+        upsert=True
+    )
+    if result.upserted_id is not None:
+        await describe_conversation(conversation_id, message["listing_id"], participants)
+    await adjust_unread_messages(message["receiver_id"], 1)
+
+async def adjust_unread_messages(user_id: str, delta: int):
+    """Move a user's total unread counter, which backs the unread badge"""
+    await db.user_counters.update_one(
+        {"_id": user_id},
+        {"$inc": {"unread_messages": delta}},
+        upsert=True
+    )
+
+async def rebuild_unread_counters() -> int:
+    """Recompute every user's unread counter from db.messages to repair drift"""
+    pipeline = [
+        {"$match": {"read": {"$ne": True}}},
+        {"$group": {"_id": "$receiver_id", "count": {"$sum": 1}}}
+    ]
+    counts = {group["_id"]: group["count"] async for group in db.messages.aggregate(pipeline)}
+    for user_id, count in counts.items():
+        await db.user_counters.update_one(
+            {"_id": user_id}, {"$set": {"unread_messages": count}}, upsert=True
+        )
+    # Users whose messages have all been read
+    await db.user_counters.update_many(
+        {"_id": {"$nin": list(counts)}, "unread_messages": {"$ne": 0}},
+        {"$set": {"unread_messages": 0}}
+    )
+    return len(counts)
+
+async def publish_message(message: dict):
+    """Push a new message to both participants' open sockets, including the sender's other tabs"""
+    event = json.dumps(jsonable_encoder({
+        "type": "message",
+        "conversation_id": message["conversation_id"],
+        "message": Message(**message)
+    }))
+    for user_id in {message["sender_id"], message["receiver_id"]}:
+        await broker.publish(user_channel(user_id), event)
+
+async def mark_conversation_read(listing_id: str, user_id: str, other_user_id: str,
+                                 message_ids: Optional[List[ObjectId]] = None) -> int:
+    """Mark messages from other_user_id to user_id as read and keep the unread counter in sync"""
+    # Messages from before send_message stored read have no field at all, and count as unread
+    query = {"listing_id": listing_id, "sender_id": other_user_id, "receiver_id": user_id, "read": {"$ne": True}}
+    if message_ids is not None:
+        query["_id"] = {"$in": message_ids}  # Only the messages the reader has actually fetched
+    result = await db.messages.update_many(query, {"$set": {"read": True}})
+    if result.modified_count:
+        await db.conversations.update_one(
+            {"_id": conversation_key(listing_id, user_id, other_user_id)},
+            {"$inc": {f"unread.{user_id}": -result.modified_count}}
+        )
+        await adjust_unread_messages(user_id, -result.modified_count)
+    return result.modified_count
+
+async def rebuild_conversations() -> int:
+    """Recompute every conversation document from db.messages"""
+    # send_message once stored neither field; threads sort on created_at and readers clear read
+    await db.messages.update_many({"read": {"$exists": False}}, {"$set": {"read": False}})
+    await db.messages.update_many(
+        {"created_at": {"$exists": False}}, [{"$set": {"created_at": {"$toDate": "$_id"}}}]
+    )
+    pipeline = [
+        {"$sort": {"created_at": 1}},
+        {"$group": {
+            "_id": {
+                "listing_id": "$listing_id",
+                "first": {"$min": ["$sender_id", "$receiver_id"]},
+                "second": {"$max": ["$sender_id", "$receiver_id"]}
+            },
+            "last_message": {"$last": "$content"},
+            "last_message_time": {"$last": "$created_at"},
+            "last_sender_id": {"$last": "$sender_id"},
+            "unread_receivers": {"$push": {"$cond": [{"$ne": ["$read", True]}, "$receiver_id", "$$REMOVE"]}}
+        }}
+    ]
+    rebuilt = 0
+    async for group in db.messages.aggregate(pipeline, allowDiskUse=True):
+        key = group["_id"]
+        participants = [key["first"], key["second"]]
+        unread = {participant: 0 for participant in participants}
+        for receiver_id in group["unread_receivers"]:
+            unread[receiver_id] = unread.get(receiver_id, 0) + 1
+        conversation_id = conversation_key(key["listing_id"], *participants)
+        # Backfill the thread key on messages sent before it was stored
+        await db.messages.update_many(
+            {
+                "listing_id": key["listing_id"],
+                "sender_id": {"$in": participants},
+                "receiver_id": {"$in": participants},
+                "conversation_id": {"$exists": False}
+            },
+            {"$set": {"conversation_id": conversation_id}}
+        )
+        await db.conversations.replace_one(
+            {"_id": conversation_id},
+            {
+                "listing_id": key["listing_id"],
+                "participants": participants,
+                "last_message": group["last_message"],
+                "last_message_time": group["last_message_time"],
+                "last_sender_id": group["last_sender_id"],
+                "unread": unread
+            },
+            upsert=True
+        )
+        await describe_conversation(conversation_id, key["listing_id"], participants)
+        rebuilt += 1
+    return rebuilt
+
+# === Follow Counters ===
+
+async def adjust_follow_counts(follower_id: str, following_id: str, delta: int) -> bool:
+    """Apply a follow (+1) or unfollow (-1) to both users' counts; False if the followed user is missing"""
+    if not ObjectId.is_valid(following_id):
+        return False
+    # Counts are shown on the profile, so they bump its version like any other profile change
+    result = await db.users.update_one(
+        {"_id": ObjectId(following_id)}, {"$inc": {"followers_count": delta, "version": 1}}
+    )
+    if not result.matched_count:
+        return False
+    if ObjectId.is_valid(follower_id):
+        await db.users.update_one(
+            {"_id": ObjectId(follower_id)}, {"$inc": {"following_count": delta, "version": 1}}
+        )
+    return True
+
+async def load_following_set(user_id: str) -> Optional[set]:
+    """Everyone user_id follows, from the response cache; None if the set is too big to cache"""
+    key = cache_key("following-set", user_id=user_id)
+    cached = await response_cache.get(key)
+    if cached is None:
+        follows = await db.follows.find(
+            {"follower_id": user_id}, {"_id": 0, "following_id": 1}
+        ).limit(FOLLOWING_SET_CACHE_MAX + 1).to_list(length=FOLLOWING_SET_CACHE_MAX + 1)
+        following = [follow["following_id"] for follow in follows]
+        if len(following) > FOLLOWING_SET_CACHE_MAX:
+            following = None  # Remember that this user needs per-request lookups
+        cached = json.dumps(following).encode()
+        await response_cache.set(key, cached, RESPONSE_CACHE_TTL, [following_cache_tag(user_id)])
+    following = json.loads(cached)
+    return set(following) if following is not None else None
+
+async def follow_status(user_id: str, target_ids: List[str]) -> Dict[str, bool]:
+    """Whether user_id follows each of target_ids"""
+    following = await load_following_set(user_id)
+    if following is None:
+        follows = await db.follows.find(
+            {"follower_id": user_id, "following_id": {"$in": target_ids}}, {"_id": 0, "following_id": 1}
+        ).to_list(length=len(target_ids))
+        following = {follow["following_id"] for follow in follows}
+    return {target_id: target_id in following for target_id in target_ids}
+
+async def rebuild_follow_counts() -> int:
+    """Drop duplicate follows and recompute every user's follower/following counts from db.follows"""
+    duplicates = db.follows.aggregate([
+        {"$sort": {"created_at": 1}},
+        {"$group": {
+            "_id": {"follower_id": "$follower_id", "following_id": "$following_id"},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+    async for group in duplicates:
+        # Keep the earliest follow so follow dates survive
+        await db.follows.delete_many({"_id": {"$in": group["ids"][1:]}})
+    
+    counts = {}
+    for field, counter in (("following_id", "followers_count"), ("follower_id", "following_count")):
+        async for group in db.follows.aggregate([{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]):
+            counts.setdefault(group["_id"], {"followers_count": 0, "following_count": 0})[counter] = group["count"]
+    
+    await db.users.update_many({}, {"$set": {"followers_count": 0, "following_count": 0}})
+    for user_id, user_counts in counts.items():
+        if ObjectId.is_valid(user_id):
+            await db.users.update_one({"_id": ObjectId(user_id)}, {"$set": user_counts})
+    await db.users.update_many({}, {"$inc": {"version": 1}})
+    return len(counts)
+
+# === Admin Stats ===
+
+LISTING_CATEGORIES = ["poultry", "coop", "cage", "eggs"]
+
+async def compute_admin_stats() -> dict:
+    """Dashboard counts: one query per collection, run concurrently"""
+    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    
+    async def listing_counts():
+        # Active total and every category in one pass over the active listings
+        total, counts = 0, {category: 0 for category in LISTING_CATEGORIES}
+        async for group in db.listings.aggregate([
+            {"$match": {"is_active": True}},
+            {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+        ]):
+            total += group["count"]
+            if group["_id"] in counts:
+                counts[group["_id"]] = group["count"]
+        return total, counts
+    
+    async def notification_counts():
+        result = await db.admin_notifications.aggregate([
+            {"$match": {"read": False}},
+            {"$group": {
+                "_id": None,
+                "unread": {"$sum": 1},
+                "high_priority": {"$sum": {"$cond": [{"$in": ["$priority", ["high", "urgent"]]}, 1, 0]}}
+            }}
+        ]).to_list(length=1)
+        return result[0] if result else {"unread": 0, "high_priority": 0}
+    
+    # Totals only need to be approximate, so they come from collection metadata rather than scans
+    total_users, total_messages, recent_users, (active_listings, by_category), notifications, unreviewed_flags = \
+        await asyncio.gather(
+            db.users.estimated_document_count(),
+            db.messages.estimated_document_count(),
+            db.users.count_documents({"created_at": {"$gte": thirty_days_ago}}),
+            listing_counts(),
+            notification_counts(),
+            db.listing_flags.count_documents({"reviewed": False})
+        )
+    
+    return {
+        "total_users": total_users,
+        "active_listings": active_listings,
+        "total_messages": total_messages,
+        "recent_users": recent_users,
+        "listings_by_category": by_category,
+        "admin_alerts": {
+            "unread_notifications": notifications["unread"],
+            "high_priority_notifications": notifications["high_priority"],
+            "unreviewed_flags": unreviewed_flags
+        },
+        "generated_at": datetime.utcnow()
+    }
+
+async def refresh_admin_stats():
+    """Keep admin_stats_snapshot current so the dashboard never waits on the counts"""
+    global admin_stats_snapshot
+    while True:
+        try:
+            admin_stats_snapshot = await compute_admin_stats()
+            await publish_admin_event("stats", admin_stats_snapshot)
+        except Exception as e:
+            logger.error(f"Admin stats refresh failed: {e}")
+        await asyncio.sleep(ADMIN_STATS_REFRESH_SECONDS)
+
+# === Admin User Directory ===
+
+USER_EXPORT_FIELDS = ["_id", "name", "email", "phone", "location", "created_at", "listing_count", "message_count"]
+USER_EXPORT_BATCH_SIZE = 500
+
+async def user_activity_counts(user_ids: List[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Active listing and message counts for a page of users, one grouped aggregation each"""
+    async def listing_counts():
+        pipeline = [
+            {"$match": {"user_id": {"$in": user_ids}, "is_active": True}},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}}
+        ]
+        return {group["_id"]: group["count"] async for group in db.listings.aggregate(pipeline)}
+    
+    async def message_counts():
+        # Count each message once per participant on the page, even when sent to oneself
+        pipeline = [
+            {"$match": {"$or": [{"sender_id": {"$in": user_ids}}, {"receiver_id": {"$in": user_ids}}]}},
+            {"$project": {"participants": {"$setUnion": [["$sender_id", "$receiver_id"]]}}},
+            {"$unwind": "$participants"},
+            {"$match": {"participants": {"$in": user_ids}}},
+            {"$group": {"_id": "$participants", "count": {"$sum": 1}}}
+        ]
+        return {group["_id"]: group["count"] async for group in db.messages.aggregate(pipeline, allowDiskUse=True)}
+    
+    return await asyncio.gather(listing_counts(), message_counts())
+
+async def with_activity_counts(users: List[dict]) -> List[dict]:
+    users = [serialize_object_id(user) for user in users]
+    listing_counts, message_counts = await user_activity_counts([user["_id"] for user in users])
+    for user in users:
+        user["listing_count"] = listing_counts.get(user["_id"], 0)
+        user["message_count"] = message_counts.get(user["_id"], 0)
+    return users
+
+async def iter_user_directory():
+    """Every user with activity counts, a batch at a time so memory stays flat"""
+    batch = []
+    async for user in db.users.find({}, {"password": 0}).batch_size(USER_EXPORT_BATCH_SIZE):
+        batch.append(user)
+        if len(batch) >= USER_EXPORT_BATCH_SIZE:
+            for row in await with_activity_counts(batch):
+                yield row
+            batch = []
+    if batch:
+        for row in await with_activity_counts(batch):
+            yield row
+
+async def export_users_ndjson():
+    async for user in iter_user_directory():
+        yield json.dumps(jsonable_encoder(user)) + "\n"
+
+async def export_users_csv():
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=USER_EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    async for user in iter_user_directory():
+        writer.writerow(user)
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+# === Flag Counters ===
+
+async def rebuild_flag_counts() -> int:
+    """Recompute unreviewed_flag_count on listings from db.listing_flags"""
+    # Flags stored before reviewed was written default to unreviewed
+    await db.listing_flags.update_many({"reviewed": {"$exists": False}}, {"$set": {"reviewed": False}})
+    counts = {}
+    async for group in db.listing_flags.aggregate([
+        {"$match": {"reviewed": False}},
+        {"$group": {"_id": "$listing_id", "count": {"$sum": 1}}}
+    ]):
+        if ObjectId.is_valid(group["_id"]):
+            counts[ObjectId(group["_id"])] = group["count"]
+    
+    await db.listings.update_many(
+        {"_id": {"$nin": list(counts)}, "unreviewed_flag_count": {"$ne": 0}},
+        {"$set": {"unreviewed_flag_count": 0}}
+    )
+    for listing_id, count in counts.items():
+        await db.listings.update_one({"_id": listing_id}, {"$set": {"unreviewed_flag_count": count}})
+    return len(counts)
+
+# === Admin Notifications ===
+
+# Stored as priority_rank so the queue sorts by severity rather than alphabetically
+NOTIFICATION_PRIORITY_RANKS = {"low": 0, "normal": 1, "high": 2, "urgent": 3}
+# Served by the read_priority_created index
+NOTIFICATION_QUEUE_SORT = [("read", 1), ("priority_rank", -1), ("created_at", -1)]
+
+def priority_rank(priority: Optional[str]) -> int:
+    return NOTIFICATION_PRIORITY_RANKS.get(priority, NOTIFICATION_PRIORITY_RANKS["normal"])
+
+async def create_admin_notification(notification_data: dict):
+    notification_data["priority_rank"] = priority_rank(notification_data.get("priority"))
+    await db.admin_notifications.insert_one(notification_data)
+    await publish_admin_event("notification", serialize_object_id(dict(notification_data)))
+
+async def publish_admin_event(event: str, data: dict):
+    """Push an event to connected admin dashboards; only notifications carry a replayable id"""
+    payload = {"event": event, "data": jsonable_encoder(data)}
+    if event == "notification":
+        payload["id"] = data["_id"]
+    await broker.publish(ADMIN_CHANNEL, json.dumps(payload))
+
+def sse_frame(payload: dict) -> str:
+    lines = [f"event: {payload['event']}"]
+    if payload.get("id"):
+        lines.append(f"id: {payload['id']}")
+    lines.append(f"data: {json.dumps(payload['data'])}")
+    return "\n".join(lines) + "\n\n"
+
+async def admin_event_stream(request: Request, last_event_id: Optional[str]):
+    """SSE body: notifications missed since last_event_id, then live notification and stats events"""
+    # Subscribe before replaying so nothing created in between is lost; duplicates are skipped by id
+    subscription = await broker.subscribe(ADMIN_CHANNEL)
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        last_id = ObjectId(last_event_id) if last_event_id and ObjectId.is_valid(last_event_id) else None
+        replayed = 0
+        while last_id:
+            # Page the replay until it catches up with the newest notification
+            missed = await db.admin_notifications.find({"_id": {"$gt": last_id}}).sort("_id", 1).limit(
+                SSE_REPLAY_LIMIT
+            ).to_list(length=SSE_REPLAY_LIMIT)
+            if not missed:
+                break
+            if replayed + len(missed) > SSE_REPLAY_MAX:
+                # Too far behind to replay; skip to the newest notification and have the client refetch
+                newest = await db.admin_notifications.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+                last_id = newest["_id"]
+                yield sse_frame({
+                    "event": "resync", "id": str(last_id), "data": {"refetch": "/api/admin/notifications"}
+                })
+                break
+            for notification in missed:
+                last_id = notification["_id"]
+                yield sse_frame({"event": "notification", "id": str(last_id), "data": jsonable_encoder(
+                    serialize_object_id(notification)
+                )})
+            replayed += len(missed)
+        
+        while not await request.is_disconnected():
+            try:
+                event = await subscription.next_event(timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"  # Also how a silent disconnect gets noticed
+                continue
+            if event is None:
+                return  # Too slow; the client reconnects with Last-Event-ID and replays
+            payload = json.loads(event)
+            if payload.get("id") and last_id and ObjectId(payload["id"]) <= last_id:
+                continue  # Already sent by the replay
+            yield sse_frame(payload)
+    finally:
+        await broker.unsubscribe(subscription)
+
+async def backfill_notification_ranks() -> int:
+    """Set priority_rank (and missing read/created_at) on notifications stored before it existed"""
+    updated = 0
+    for priority in list(NOTIFICATION_PRIORITY_RANKS) + [None]:
+        query = {"priority_rank": {"$exists": False}}
+        query["priority"] = priority if priority else {"$nin": list(NOTIFICATION_PRIORITY_RANKS)}
+        result = await db.admin_notifications.update_many(query, {"$set": {"priority_rank": priority_rank(priority)}})
+        updated += result.modified_count
+    await db.admin_notifications.update_many({"read": {"$exists": False}}, {"$set": {"read": False}})
+    await db.admin_notifications.update_many(
+        {"created_at": {"$exists": False}}, [{"$set": {"created_at": {"$toDate": "$_id"}}}]
+    )
+    return updated
+
+# === Request Loaders ===
+
+class RequestLoaders:
+    """Batch loaders shared by one request, so enrichment costs one query per collection"""
+    
+    def __init__(self):
+        self.users = DocumentLoader(db.users, {"password": 0})
+        self.listings = DocumentLoader(db.listings)
+        self.listing_flags = GroupLoader(db.listing_flags, "listing_id", per_key_limit=100)
+        self.admin_actions = GroupLoader(
+            db.admin_actions, "listing_id", sort=[("created_at", -1)], per_key_limit=10
+        )
+
+def get_loaders() -> RequestLoaders:
+    return RequestLoaders()
+
+# === Image Helpers ===
+
+async def store_listing_images(images: List[str]) -> List[str]:
+    """Decode uploaded images into the blob store and return their references"""
+    image_refs = []
+    for image in images:
+        if digest_from_url(image):
+            # Already stored (e.g. re-submitted listing), keep the reference
+            image_refs.append(image)
+            continue
+        try:
+            data, content_type = decode_image(image)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid image: {e}")
+        digest = await blob_store.put(data, content_type)
+        image_refs.append(image_url(digest))
+    return image_refs
+
+async def get_image_variants(digest: str) -> Optional[dict]:
+    """Return derivative references for a stored image, rendering them if needed"""
+    # Derivatives are memoized per source hash, so duplicate uploads are only resized once
+    cached = await db.image_derivatives.find_one({"_id": digest})
+    if cached:
+        return cached["variants"]
+    
+    blob = await blob_store.get(digest)
+    if not blob:
+        return None
+    
+    derivatives = await render_derivatives(blob[0])
+    variants = {}
+    for name, data in derivatives.items():
+        variants[name] = image_url(await blob_store.put(data, DERIVATIVE_CONTENT_TYPE))
+    
+    await db.image_derivatives.update_one(
+        {"_id": digest},
+        {"$set": {"variants": variants, "created_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return variants
+
+async def process_listing_images(listing_id: ObjectId, image_refs: List[str]):
+    """Background task: generate derivatives for a listing's images"""
+    image_variants = []
+    for image_ref in image_refs:
+        digest = digest_from_url(image_ref)
+        if not digest:
+            continue
+        try:
+            variants = await get_image_variants(digest)
+        except Exception as e:
+            logger.warning(f"Could not generate derivatives for image {digest}: {e}")
+            continue
+        if variants:
+            image_variants.append(variants)
+    
+    thumbnails = [variants["thumb"] for variants in image_variants]
+    listing = await db.listings.find_one_and_update(
+        {"_id": listing_id},
+        {
+            "$set": {
+                "image_variants": image_variants,
+                "thumbnails": thumbnails,
+                "thumbnail": thumbnails[0] if thumbnails else None
+            },
+            "$inc": {"version": 1}
+        },
+        projection={"category": 1}
+    )
+    if listing:
+        await invalidate_listing_cache(str(listing_id), listing.get("category"))
+
+# Listing field projections for list endpoints
+LISTING_FIELDS = {field.alias or name for name, field in Listing.model_fields.items()}
+# images is trimmed to its first entry as a thumbnail fallback for listings without derivatives
+LISTING_SUMMARY_PROJECTION = {
+    "user_id": 1,
+    "title": 1,
+    "category": 1,
+    "price": 1,
+    "location": 1,
+    "thumbnail": 1,
+    "created_at": 1,
+    "images": {"$slice": 1}
+}
+
+def listing_projection(view: str = "full", fields: Optional[str] = None) -> Optional[dict]:
+    """Build the Mongo projection for a listing view or an explicit field list"""
+    if fields:
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = [field for field in requested if field not in LISTING_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown listing fields: {', '.join(unknown)}")
+        return {field: 1 for field in requested}
+    if view == "summary":
+        return dict(LISTING_SUMMARY_PROJECTION)
+    if view == "full":
+        return None
+    raise HTTPException(status_code=400, detail="view must be 'summary' or 'full'")
+
+def aggregation_projection(projection: dict) -> dict:
+    """Convert a find() projection into a $project stage body"""
+    # $project expects $slice as an expression rather than a projection operator
+    return {
+        field: {"$slice": [f"${field}", value["$slice"]]} if isinstance(value, dict) else value
+        for field, value in projection.items()
+    }
+
+def listing_summary(listing) -> ListingSummary:
+    listing = serialize_object_id(listing)
+    images = listing.pop("images", None) or []
+    if not listing.get("thumbnail") and images:
+        listing["thumbnail"] = images[0]
+    return ListingSummary(**listing)
+
+def render_listings(listings, view: str = "full", fields: Optional[str] = None, card: bool = True):
+    """Serialize listings for the requested view; explicit fields are returned as stored"""
+    if fields:
+        return [serialize_object_id(listing) for listing in listings]
+    if view == "summary":
+        return [listing_summary(listing) for listing in listings]
+    serialize = serialize_listing_card if card else serialize_object_id
+    return [Listing(**serialize(listing)) for listing in listings]
+
+async def fetch_relevance_page(query: dict, projection: Optional[dict], limit: int, skip: int, cursor: Optional[str]):
+    """Fetch a page of $text matches ordered by weighted text score"""
+    if cursor is not None:
+        # Text scores can't be range-filtered, so relevance ordering only pages by skip
+        raise HTTPException(status_code=400, detail="Cursor pagination is not supported with sort_by=relevance")
+    projection = {**(projection or {}), "score": {"$meta": "textScore"}}
+    listings = await db.listings.find(query, projection).sort([
+        ("score", {"$meta": "textScore"}), ("_id", -1)
+    ]).skip(skip).limit(limit).to_list(length=limit)
+    return listings, None
+
+def serialize_listing_card(listing):
+    """Serialize a listing for grid views, returning only thumbnail image references"""
+    listing = serialize_object_id(listing)
+    thumbnails = listing.pop("thumbnails", None)
+    listing.pop("image_variants", None)
+    # Fall back to the first original until the derivatives have been generated
+    listing["images"] = thumbnails or listing.get("images", [])[:1]
+    return listing
+
 # === API Endpoints ===
 
 # Health check
@@ -283,8 +1332,15 @@ async def register_user(user_data: UserCreate):
     # Hash password and create user
     user_dict = user_data.dict()
     user_dict['password'] = hash_password(user_data.password)
+    user_dict['created_at'] = user_dict['updated_at'] = datetime.utcnow()
+    user_dict.update(location_fields(user_data.location))
+    user_dict['followers_count'] = user_dict['following_count'] = 0
     
-    result = await db.users.insert_one(user_dict)
+    try:
+        result = await db.users.insert_one(user_dict)
+    except DuplicateKeyError:
+        # A concurrent registration won the race past the check above; email_unique rejects this one
+        raise HTTPException(status_code=400, detail="Email already registered")
     user_id = str(result.inserted_id)
     
     # Generate token
@@ -312,90 +1368,168 @@ async def login_user(login_data: UserLogin):
         "user_id": str(user['_id'])
     }
 
+# Batch profiles for listing grids; same documents as get_user_profile
+@api_router.post("/users/batch", response_model=dict)
+async def get_user_profiles(batch: IdBatch):
+    return await user_profiles_batch(batch_ids(batch))
+
 # User Profile with Rating Info
 @api_router.get("/users/{user_id}", response_model=dict)
-async def get_user_profile(user_id: str):
+async def get_user_profile(user_id: str, request: Request, response: Response):
     try:
         user = await db.users.find_one({"_id": ObjectId(user_id)})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user = serialize_object_id(user)
-        # Remove password from response
-        user.pop('password', None)
-        
-        # Add rating information if user is a seller
-        rating_summary_pipeline = [
-            {"$match": {"seller_id": user_id}},
-            {"$group": {
-                "_id": None,
-                "average_rating": {"$avg": "$rating"},
-                "total_ratings": {"$sum": 1}
-            }}
-        ]
-        
-        rating_result = await db.ratings.aggregate(rating_summary_pipeline).to_list(length=1)
-        
-        if rating_result:
-            user["seller_rating"] = {
-                "average_rating": round(rating_result[0]["average_rating"], 1),
-                "total_ratings": rating_result[0]["total_ratings"]
-            }
-        else:
-            user["seller_rating"] = {
-                "average_rating": 0.0,
-                "total_ratings": 0
-            }
+        stats = await get_seller_stats(user_id)
+        etag = compute_etag(
+            "user", user_id, user.get("version", 0), user.get("updated_at"), *seller_stats_marker(stats)
+        )
+        if etag_matches(request, etag):
+            return not_modified(etag, PROFILE_CACHE_CONTROL)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = PROFILE_CACHE_CONTROL
         
-        return user
+        # Without password, with rating information if user is a seller
+        return user_profile(user, stats)
     except Exception as e:
         raise HTTPException(status_code=404, detail="User not found")
 
 # Listings
-@api_router.get("/listings", response_model=List[Listing])
-async def get_listings(category: Optional[str] = None, limit: int = 20, skip: int = 0):
-    query = {"is_active": True}
-    if category:
-        query["category"] = category
-    
-    cursor = db.listings.find(query).sort("created_at", -1).limit(limit).skip(skip)
-    listings = await cursor.to_list(length=limit)
+@api_router.get("/listings", response_model=None, responses={200: {"model": List[Listing]}})
+async def get_listings(
+    category: Optional[str] = None,
+    limit: int = 20,
+    skip: int = 0,
+    view: str = "full",
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    embed: Optional[str] = None  # "seller" attaches seller profiles from one batched lookup
+):
+    async def load():
+        query = {"is_active": True}
+        if category:
+            query["category"] = category
+        
+        projection = listing_projection(view, fields)
+        if projection and embed == "seller":
+            projection["user_id"] = 1
+        listings, next_cursor = await fetch_page(
+            db.listings, query, "created_at", -1, limit, skip, cursor, projection
+        )
+        items = render_listings(listings, view, fields)
+        if embed == "seller":
+            items = await embed_sellers(items)
+        return page_response(items, cursor, next_cursor), None
     
-    return [serialize_object_id(listing) for listing in listings]
+    key = cache_key(
+        "listings", category=category, limit=limit, skip=skip, view=view, fields=fields, cursor=cursor, embed=embed
+    )
+    body, _ = await cached_body(key, [listings_cache_tag(category)], load)
+    return Response(content=body, media_type="application/json")
 
 @api_router.get("/listings/{listing_id}", response_model=Listing)
-async def get_listing(listing_id: str):
-    try:
-        listing = await db.listings.find_one({"_id": ObjectId(listing_id), "is_active": True})
+async def get_listing(listing_id: str, request: Request):
+    async def load():
+        try:
+            listing = await db.listings.find_one({"_id": ObjectId(listing_id), "is_active": True})
+        except Exception:
+            listing = None
         if not listing:
             raise HTTPException(status_code=404, detail="Listing not found")
-        
-        return serialize_object_id(listing)
-    except Exception as e:
-        raise HTTPException(status_code=404, detail="Listing not found")
+        return Listing(**serialize_object_id(listing)), listing_etag(listing)
+    
+    body, etag = await cached_body(cache_key("listing", id=listing_id), [listing_cache_tag(listing_id)], load)
+    return conditional_json(request, body, etag, LISTING_CACHE_CONTROL)
 
 @api_router.post("/listings", response_model=Listing)
-async def create_listing(listing_data: ListingCreate, user_id: str):
+async def create_listing(listing_data: ListingCreate, user_id: str, background_tasks: BackgroundTasks):
     # In a real app, you'd extract user_id from JWT token
     listing_dict = listing_data.dict()
     listing_dict['user_id'] = user_id
     listing_dict['is_active'] = True  # Ensure is_active is set
+    listing_dict['created_at'] = listing_dict['updated_at'] = datetime.utcnow()
+    listing_dict['version'] = 1
+    listing_dict.update(location_fields(listing_data.location))
+    # Fixed at creation so the feed knows whether to read it from timelines or merge it in
+    listing_dict['fanned_out'] = await fans_out(db, user_id)
+    
+    seller_stats = await db.seller_stats.find_one({"_id": user_id})
+    listing_dict['seller_avg_rating'] = seller_average(seller_stats)
+    listing_dict['seller_rating_count'] = seller_stats["count"] if seller_stats else 0
+    listing_dict['images'] = await store_listing_images(listing_data.images)
     
     result = await db.listings.insert_one(listing_dict)
     
+    # Resize images and fill follower timelines after the response is sent
+    if listing_dict['images']:
+        background_tasks.add_task(process_listing_images, result.inserted_id, listing_dict['images'])
+    background_tasks.add_task(fan_out_listing, db, listing_dict)
+    
+    await invalidate_listing_cache(None, listing_data.category)
+    
     # Get the created listing
     listing = await db.listings.find_one({"_id": result.inserted_id})
     return serialize_object_id(listing)
 
-@api_router.get("/users/{user_id}/listings", response_model=List[Listing])
-async def get_user_listings(user_id: str):
-    cursor = db.listings.find({"user_id": user_id, "is_active": True}).sort("created_at", -1)
+@api_router.get("/images/{digest}")
+async def get_image(digest: str, request: Request):
+    """Serve a stored image by content hash"""
+    if not DIGEST_RE.match(digest):
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    # Content never changes for a given hash, so the hash is a strong ETag
+    etag = f'"{digest}"'
+    if etag_matches(request, etag):
+        return not_modified(etag, IMAGE_CACHE_CONTROL)
+    
+    blob = await blob_store.get(digest)
+    if not blob:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    data, content_type = blob
+    if content_type not in ALLOWED_IMAGE_TYPES.values():
+        # Blobs stored before upload validation are never rendered inline
+        content_type = "application/octet-stream"
+    return Response(
+        content=data,
+        media_type=content_type,
+        headers={"ETag": etag, "Cache-Control": IMAGE_CACHE_CONTROL, "X-Content-Type-Options": "nosniff"}
+    )
+
+@api_router.get("/users/{user_id}/listings", response_model=None, responses={200: {"model": List[Listing]}})
+async def get_user_listings(
+    user_id: str,
+    request: Request,
+    response: Response,
+    view: str = "full",
+    fields: Optional[str] = None
+):
+    # Fingerprint the seller's active listings without shipping them
+    signature = await db.listings.aggregate([
+        {"$match": {"user_id": user_id, "is_active": True}},
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "versions": {"$sum": {"$ifNull": ["$version", 0]}},
+            "last_updated": {"$max": "$updated_at"}
+        }}
+    ]).to_list(length=1)
+    marker = (signature[0]["count"], signature[0]["versions"], signature[0]["last_updated"]) if signature else (0,)
+    etag = compute_etag("user-listings", user_id, view, fields, *marker)
+    if etag_matches(request, etag):
+        return not_modified(etag, USER_LISTINGS_CACHE_CONTROL)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = USER_LISTINGS_CACHE_CONTROL
+    
+    projection = listing_projection(view, fields)
+    cursor = db.listings.find({"user_id": user_id, "is_active": True}, projection).sort("created_at", -1)
     listings = await cursor.to_list(length=100)
     
-    return [serialize_object_id(listing) for listing in listings]
+    return render_listings(listings, view, fields, card=False)
 
 # Search
-@api_router.get("/search", response_model=List[Listing])
+@api_router.get("/search", response_model=None, responses={200: {"model": List[Listing]}})
 async def search_listings(
     q: Optional[str] = None,
     category: Optional[str] = None,
@@ -403,16 +1537,16 @@ async def search_listings(
     max_price: Optional[float] = None,
     location: Optional[str] = None,
     limit: int = 20,
-    skip: int = 0
+    skip: int = 0,
+    view: str = "full",
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    sort_by: str = "created_at"  # created_at, relevance
 ):
     query = {"is_active": True}
     
     if q:
-        query["$or"] = [
-            {"title": {"$regex": q, "$options": "i"}},
-            {"description": {"$regex": q, "$options": "i"}},
-            {"breed": {"$regex": q, "$options": "i"}}
-        ]
+        query["$text"] = {"$search": q}
     
     if category:
         query["category"] = category
@@ -428,10 +1562,15 @@ async def search_listings(
     if location:
         query["location"] = {"$regex": location, "$options": "i"}
     
-    cursor = db.listings.find(query).sort("created_at", -1).limit(limit).skip(skip)
-    listings = await cursor.to_list(length=limit)
+    projection = listing_projection(view, fields)
+    if q and sort_by == "relevance":
+        listings, next_cursor = await fetch_relevance_page(query, projection, limit, skip, cursor)
+    else:
+        listings, next_cursor = await fetch_page(
+            db.listings, query, "created_at", -1, limit, skip, cursor, projection
+        )
     
-    return [serialize_object_id(listing) for listing in listings]
+    return page_response(render_listings(listings, view, fields), cursor, next_cursor)
 
 # Messages
 @api_router.post("/messages", response_model=Message)
@@ -439,69 +1578,133 @@ async def send_message(message_data: MessageCreate, sender_id: str):
     # In a real app, you'd extract sender_id from JWT token
     message_dict = message_data.dict()
     message_dict['sender_id'] = sender_id
+    message_dict['created_at'] = datetime.utcnow()
+    message_dict['read'] = False
+    message_dict['conversation_id'] = conversation_key(message_dict['listing_id'], sender_id, message_dict['receiver_id'])
     
     result = await db.messages.insert_one(message_dict)
+    await record_conversation_message(message_dict)
     
     # Get the created message
     message = await db.messages.find_one({"_id": result.inserted_id})
-    return serialize_object_id(message)
+    message = serialize_object_id(message)
+    await publish_message(message)
+    return message
+
+@api_router.websocket("/ws")
+async def realtime_socket(websocket: WebSocket, user_id: Optional[str] = None, token: Optional[str] = None):
+    """Push new messages for the token's user as they are sent; clients only need to hold the socket open"""
+    await websocket.accept()
+    if not token:
+        # Browsers can't set headers on a WebSocket, so the token may also arrive as the first frame
+        try:
+            token = (await asyncio.wait_for(websocket.receive_text(), WS_AUTH_TIMEOUT_SECONDS)).strip()
+        except (asyncio.TimeoutError, WebSocketDisconnect, RuntimeError):
+            token = None
+    token_user_id = decode_access_token(token)
+    if not token_user_id or (user_id and user_id != token_user_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Unauthorized")
+        return
+    user_id = token_user_id
+    subscription = await broker.subscribe(user_channel(user_id))
+    
+    async def push_events():
+        while True:
+            event = await subscription.next_event()
+            if event is None:
+                # Too slow to keep up: close so the client reconnects and refetches over REST
+                await websocket.close(code=1013, reason="Client too slow")
+                return
+            await websocket.send_text(event)
+    
+    async def wait_for_disconnect():
+        # Client frames are ignored, but reading them is how a disconnect is noticed
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    
+    tasks = [asyncio.ensure_future(push_events()), asyncio.ensure_future(wait_for_disconnect())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception():
+                logger.debug(f"Realtime socket for {user_id} closed: {task.exception()}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await broker.unsubscribe(subscription)
+
+@api_router.get("/conversations/{listing_id}/{other_user_id}/messages")
+async def get_conversation_messages(
+    listing_id: str,
+    other_user_id: str,
+    user_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Get a conversation thread oldest-first; next_cursor pages back to older messages"""
+    authorize_user(user_id, credentials)
+    limit = max(1, min(limit, 200))
+    query = apply_cursor(
+        {"conversation_id": conversation_key(listing_id, user_id, other_user_id)}, cursor, "created_at", -1
+    )
+    # Newest page first by index order, then flipped for display
+    messages = await db.messages.find(query).sort(
+        [("created_at", -1), ("_id", -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    messages, next_cursor = split_page(messages, limit, "created_at")
+    messages.reverse()
+    
+    # Reading the thread marks the fetched incoming messages read in one update
+    unread_ids = [
+        message["_id"] for message in messages
+        if message["receiver_id"] == user_id and not message.get("read", False)
+    ]
+    if unread_ids:
+        await mark_conversation_read(listing_id, user_id, other_user_id, unread_ids)
+        for message in messages:
+            if message["_id"] in unread_ids:
+                message["read"] = True
+    
+    items = [Message(**serialize_object_id(message)) for message in messages]
+    return page_response(items, cursor, next_cursor)
+
+@api_router.post("/conversations/{listing_id}/{other_user_id}/read")
+async def mark_conversation_read_endpoint(
+    listing_id: str,
+    other_user_id: str,
+    user_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Mark every message other_user_id sent to user_id about a listing as read"""
+    authorize_user(user_id, credentials)
+    marked = await mark_conversation_read(listing_id, user_id, other_user_id)
+    return {"message": "Conversation marked as read", "marked_read": marked}
+
+@api_router.get("/users/{user_id}/unread-count")
+async def get_unread_count(user_id: str):
+    """Total unread messages for the badge, read from a single counter document"""
+    counters = await db.user_counters.find_one({"_id": user_id}, {"unread_messages": 1})
+    return {"user_id": user_id, "unread_count": max((counters or {}).get("unread_messages", 0), 0)}
 
 @api_router.get("/users/{user_id}/conversations", response_model=List[Conversation])
 async def get_user_conversations(user_id: str):
-    # Get all messages where user is sender or receiver
-    pipeline = [
-        {
-            "$match": {
-                "$or": [
-                    {"sender_id": user_id},
-                    {"receiver_id": user_id}
-                ]
-            }
-        },
-        {
-            "$sort": {"created_at": -1}
-        },
-        {
-            "$group": {
-                "_id": {
-                    "listing_id": "$listing_id",
-                    "other_user": {
-                        "$cond": [
-                            {"$eq": ["$sender_id", user_id]},
-                            "$receiver_id",
-                            "$sender_id"
-                        ]
-                    }
-                },
-                "last_message": {"$first": "$content"},
-                "last_message_time": {"$first": "$created_at"},
-                "messages": {"$push": "$$ROOT"}
-            }
-        }
-    ]
-    
-    conversations_cursor = db.messages.aggregate(pipeline)
-    conversations_data = await conversations_cursor.to_list(length=100)
+    # Conversations are maintained by send_message, newest activity first
+    conversations_data = await db.conversations.find(
+        {"participants": user_id}
+    ).sort("last_message_time", -1).to_list(length=100)
     
     conversations = []
     for conv_data in conversations_data:
-        # Get listing details
-        listing = await db.listings.find_one({"_id": ObjectId(conv_data["_id"]["listing_id"])})
-        # Get other user details
-        other_user = await db.users.find_one({"_id": ObjectId(conv_data["_id"]["other_user"])})
-        
-        # Count unread messages
-        unread_count = len([msg for msg in conv_data["messages"] 
-                           if msg["receiver_id"] == user_id and not msg.get("read", False)])
-        
+        other_user_id = conversation_other_user(conv_data, user_id)
         conversations.append(Conversation(
-            id=f"{conv_data['_id']['listing_id']}_{conv_data['_id']['other_user']}",
-            listing_id=conv_data["_id"]["listing_id"],
-            listing_title=listing["title"] if listing else "Unknown Listing",
-            other_user_name=other_user["name"] if other_user else "Unknown User",
+            id=f"{conv_data['listing_id']}_{other_user_id}",
+            listing_id=conv_data["listing_id"],
+            listing_title=conv_data.get("listing_title") or "Unknown Listing",
+            other_user_name=conv_data.get("participant_names", {}).get(other_user_id) or "Unknown User",
             last_message=conv_data["last_message"],
-            last_message_time=conv_data["last_message_time"] or datetime.utcnow(),
-            unread_count=unread_count
+            last_message_time=conv_data.get("last_message_time") or datetime.utcnow(),
+            unread_count=max(conv_data.get("unread", {}).get(user_id, 0), 0)
         ))
     
     return conversations
@@ -528,71 +1731,52 @@ async def create_rating(rating_data: RatingCreate, buyer_id: str):
     # Create the rating
     rating_dict = rating_data.dict()
     rating_dict['buyer_id'] = buyer_id
+    rating_dict['created_at'] = datetime.utcnow()
     
     result = await db.ratings.insert_one(rating_dict)
+    await record_seller_rating(rating_data.seller_id, rating_data.rating)
+    
     rating = await db.ratings.find_one({"_id": result.inserted_id})
     return serialize_object_id(rating)
 
-@api_router.get("/sellers/{seller_id}/ratings", response_model=List[Rating])
-async def get_seller_ratings(seller_id: str, limit: int = 20, skip: int = 0):
+@api_router.get("/sellers/{seller_id}/ratings", response_model=None, responses={200: {"model": List[Rating]}})
+async def get_seller_ratings(seller_id: str, limit: int = 20, skip: int = 0, cursor: Optional[str] = None):
     """Get all ratings for a specific seller"""
-    cursor = db.ratings.find({"seller_id": seller_id}).sort("created_at", -1).limit(limit).skip(skip)
-    ratings = await cursor.to_list(length=limit)
-    return [serialize_object_id(rating) for rating in ratings]
+    ratings, next_cursor = await fetch_page(
+        db.ratings, {"seller_id": seller_id}, "created_at", -1, limit, skip, cursor
+    )
+    items = [Rating(**serialize_object_id(rating)) for rating in ratings]
+    return page_response(items, cursor, next_cursor)
+
+@api_router.post("/sellers/rating-summaries", response_model=Dict[str, RatingSummary])
+async def get_seller_rating_summaries(batch: IdBatch):
+    """Rating summaries for up to MAX_BATCH_IDS sellers, keyed by seller id"""
+    seller_ids = batch_ids(batch)
+    stats = await seller_stats_batch(seller_ids)
+    return {seller_id: seller_rating_summary(seller_id, stats.get(seller_id)) for seller_id in seller_ids}
 
 @api_router.get("/sellers/{seller_id}/rating-summary", response_model=RatingSummary)
-async def get_seller_rating_summary(seller_id: str):
+async def get_seller_rating_summary(seller_id: str, request: Request, response: Response):
     """Get rating summary statistics for a seller"""
-    # Aggregate ratings for the seller
-    pipeline = [
-        {"$match": {"seller_id": seller_id}},
-        {"$group": {
-            "_id": "$seller_id",
-            "average_rating": {"$avg": "$rating"},
-            "total_ratings": {"$sum": 1},
-            "ratings": {"$push": "$rating"}
-        }}
-    ]
-    
-    result = await db.ratings.aggregate(pipeline).to_list(length=1)
-    
-    if not result:
-        return RatingSummary(
-            seller_id=seller_id,
-            average_rating=0.0,
-            total_ratings=0,
-            rating_breakdown={5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-        )
-    
-    data = result[0]
+    # Sum, count and histogram are maintained by create_rating (see rebuild-seller-stats)
+    stats = await get_seller_stats(seller_id)
+    etag = compute_etag("rating-summary", seller_id, *seller_stats_marker(stats))
+    if etag_matches(request, etag):
+        return not_modified(etag, RATING_SUMMARY_CACHE_CONTROL)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = RATING_SUMMARY_CACHE_CONTROL
     
-    # Calculate rating breakdown
-    rating_breakdown = {5: 0, 4: 0, 3: 0, 2: 0, 1: 0}
-    for rating in data["ratings"]:
-        rating_breakdown[rating] += 1
-    
-    return RatingSummary(
-        seller_id=seller_id,
-        average_rating=round(data["average_rating"], 1),
-        total_ratings=data["total_ratings"],
-        rating_breakdown=rating_breakdown
-    )
+    return seller_rating_summary(seller_id, stats)
 
 # Advanced Search Endpoint
-@api_router.post("/advanced-search", response_model=List[Listing])
+@api_router.post("/advanced-search", response_model=None, responses={200: {"model": List[Listing]}})
 async def advanced_search(search_params: AdvancedSearchParams):
     """Advanced search with multiple filters and sorting options"""
     query = {"is_active": True}
     
     # Text search
     if search_params.query:
-        query["$or"] = [
-            {"title": {"$regex": search_params.query, "$options": "i"}},
-            {"description": {"$regex": search_params.query, "$options": "i"}},
-            {"breed": {"$regex": search_params.query, "$options": "i"}},
-            {"egg_type": {"$regex": search_params.query, "$options": "i"}},
-            {"location": {"$regex": search_params.query, "$options": "i"}}
-        ]
+        query["$text"] = {"$search": search_params.query}
     
     # Category filter
     if search_params.category:
@@ -607,9 +1791,20 @@ async def advanced_search(search_params: AdvancedSearchParams):
             price_query["$lte"] = search_params.max_price
         query["price"] = price_query
     
-    # Location filter
-    if search_params.location:
+    # Location filter: radius and distance searches use the listing's geo point, otherwise match text
+    origin = None
+    if search_params.location and (search_params.radius_miles or search_params.sort_by == "distance"):
+        resolved = resolve_location(search_params.location)
+        # A state-level origin is too coarse for a radius, so it falls back to text matching
+        if resolved and resolved[1] in GEO_PRECISIONS:
+            origin = resolved[0]
+    
+    if search_params.location and not origin:
         query["location"] = {"$regex": search_params.location, "$options": "i"}
+    elif origin and search_params.radius_miles and search_params.sort_by != "distance":
+        query["geo"] = {"$geoWithin": {
+            "$centerSphere": [origin["coordinates"], miles_to_radians(search_params.radius_miles)]
+        }}
     
     # Category-specific filters
     if search_params.egg_type:
@@ -621,87 +1816,87 @@ async def advanced_search(search_params: AdvancedSearchParams):
     if search_params.breed:
         query["breed"] = {"$regex": search_params.breed, "$options": "i"}
     
+    if search_params.min_rating is not None:
+        query["seller_avg_rating"] = {"$gte": search_params.min_rating}
+    
     # Freshness filter for eggs (max days old)
     if search_params.max_days_old and search_params.category == "eggs":
         cutoff_date = datetime.utcnow() - timedelta(days=search_params.max_days_old)
         query["laid_date"] = {"$gte": cutoff_date.isoformat()[:10]}
     
+    projection = listing_projection(search_params.view, search_params.fields)
+    
     # Sorting
     sort_field = search_params.sort_by
     sort_direction = -1 if search_params.sort_order == "desc" else 1
     
     # Handle special sorting cases
-    if sort_field == "rating":
-        # For rating sort, we'll need to do aggregation to join with ratings
-        pipeline = [
-            {"$match": query},
-            {
-                "$lookup": {
-                    "from": "ratings",
-                    "localField": "user_id",
-                    "foreignField": "seller_id",
-                    "as": "seller_ratings"
-                }
-            },
-            {
-                "$addFields": {
-                    "average_rating": {
-                        "$cond": {
-                            "if": {"$gt": [{"$size": "$seller_ratings"}, 0]},
-                            "then": {"$avg": "$seller_ratings.rating"},
-                            "else": 0
-                        }
-                    }
-                }
-            },
-            {"$sort": {"average_rating": sort_direction}},
-            {"$limit": search_params.limit},
-            {"$skip": search_params.skip}
-        ]
-        
-        cursor = db.listings.aggregate(pipeline)
-        listings = await cursor.to_list(length=search_params.limit)
+    if sort_field == "relevance" and search_params.query:
+        listings, next_cursor = await fetch_relevance_page(
+            query, projection, search_params.limit, search_params.skip, search_params.cursor
+        )
+    elif sort_field == "relevance":
+        # Nothing to rank without a query; fall back to newest first
+        listings, next_cursor = await fetch_page(
+            db.listings, query, "created_at", -1, search_params.limit,
+            search_params.skip, search_params.cursor, projection
+        )
+    elif sort_field == "distance" and origin and "$text" in query:
+        listings, next_cursor = await fetch_text_nearby_page(
+            query, origin, search_params.radius_miles, search_params.limit,
+            search_params.skip, search_params.cursor, projection
+        )
+    elif sort_field == "distance" and origin:
+        # Nearest first regardless of sort_order
+        listings, next_cursor = await fetch_nearby_page(
+            query, origin, search_params.radius_miles, search_params.limit,
+            search_params.skip, search_params.cursor, projection
+        )
+    elif sort_field == "rating":
+        # Sellers' averages are denormalized onto listings by create_rating
+        listings, next_cursor = await fetch_page(
+            db.listings, query, "seller_avg_rating", sort_direction, search_params.limit,
+            search_params.skip, search_params.cursor, projection
+        )
     else:
         # Regular sorting
-        cursor = db.listings.find(query).sort(sort_field, sort_direction).limit(search_params.limit).skip(search_params.skip)
-        listings = await cursor.to_list(length=search_params.limit)
+        listings, next_cursor = await fetch_page(
+            db.listings, query, sort_field, sort_direction, search_params.limit,
+            search_params.skip, search_params.cursor, projection
+        )
     
-    return [serialize_object_id(listing) for listing in listings]
+    items = render_listings(listings, search_params.view, search_params.fields)
+    return page_response(items, search_params.cursor, next_cursor)
 
 # Follow System Endpoints
 @api_router.post("/users/{user_id}/follow")
-async def follow_user(user_id: str, current_user_id: str):
+async def follow_user(user_id: str, current_user_id: str, background_tasks: BackgroundTasks):
     """Follow a user"""
     if user_id == current_user_id:
         raise HTTPException(status_code=400, detail="You cannot follow yourself")
     
-    # Check if user exists
-    try:
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-    except Exception:
+    if not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Check if already following
-    existing_follow = await db.follows.find_one({
-        "follower_id": current_user_id,
-        "following_id": user_id
-    })
-    
-    if existing_follow:
-        raise HTTPException(status_code=400, detail="Already following this user")
-    
-    # Create follow relationship
+    # Create follow relationship; the unique follower_following index rejects repeats
     follow_data = {
         "follower_id": current_user_id,
         "following_id": user_id,
         "created_at": datetime.utcnow()
     }
+    try:
+        await db.follows.insert_one(follow_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Already following this user")
     
-    result = await db.follows.insert_one(follow_data)
-    follow = await db.follows.find_one({"_id": result.inserted_id})
-    return serialize_object_id(follow)
+    # Check if user exists while counting the follow
+    if not await adjust_follow_counts(current_user_id, user_id, 1):
+        await db.follows.delete_one({"_id": follow_data["_id"]})
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    await response_cache.invalidate_tags([following_cache_tag(current_user_id)])
+    background_tasks.add_task(backfill_timeline, db, current_user_id, user_id)
+    return serialize_object_id(follow_data)
 
 @api_router.delete("/users/{user_id}/follow")
 async def unfollow_user(user_id: str, current_user_id: str):
@@ -718,194 +1913,188 @@ async def unfollow_user(user_id: str, current_user_id: str):
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="You are not following this user")
     
+    await adjust_follow_counts(current_user_id, user_id, -1)
+    await remove_from_timeline(db, current_user_id, user_id)
+    await response_cache.invalidate_tags([following_cache_tag(current_user_id)])
     return {"message": "Successfully unfollowed user"}
 
 @api_router.get("/users/{user_id}/followers")
-async def get_user_followers(user_id: str, limit: int = 20, skip: int = 0):
+async def get_user_followers(
+    user_id: str,
+    limit: int = 20,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    loaders: RequestLoaders = Depends(get_loaders)
+):
     """Get users following this user"""
     # Get follow relationships first
-    follows = await db.follows.find({"following_id": user_id}).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    follows, next_cursor = await fetch_page(
+        db.follows, {"following_id": user_id}, "created_at", -1, limit, skip, cursor
+    )
     
+    # Get follower user details in one query; invalid or deleted users are skipped
+    follower_users = await loaders.users.load_many([follow["follower_id"] for follow in follows])
     followers = []
-    for follow in follows:
-        # Get follower user details
-        try:
-            follower_user = await db.users.find_one({"_id": ObjectId(follow["follower_id"])})
-            if follower_user:
-                followers.append({
-                    "_id": str(follow["_id"]),
-                    "created_at": follow["created_at"],
-                    "follower": {
-                        "_id": str(follower_user["_id"]),
-                        "name": follower_user["name"],
-                        "location": follower_user["location"],
-                        "email": follower_user["email"]
-                    }
-                })
-        except Exception:
-            continue  # Skip invalid follower IDs
+    for follow, follower_user in zip(follows, follower_users):
+        if follower_user:
+            followers.append({
+                "_id": str(follow["_id"]),
+                "created_at": follow["created_at"],
+                "follower": {
+                    "_id": str(follower_user["_id"]),
+                    "name": follower_user["name"],
+                    "location": follower_user["location"],
+                    "email": follower_user["email"]
+                }
+            })
     
-    return followers
+    return page_response(followers, cursor, next_cursor)
 
 @api_router.get("/users/{user_id}/following")
-async def get_user_following(user_id: str, limit: int = 20, skip: int = 0):
+async def get_user_following(
+    user_id: str,
+    limit: int = 20,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    loaders: RequestLoaders = Depends(get_loaders)
+):
     """Get users this user is following"""
     # Get follow relationships first
-    follows = await db.follows.find({"follower_id": user_id}).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    follows, next_cursor = await fetch_page(
+        db.follows, {"follower_id": user_id}, "created_at", -1, limit, skip, cursor
+    )
     
+    # Get following user details in one query; invalid or deleted users are skipped
+    following_users = await loaders.users.load_many([follow["following_id"] for follow in follows])
     following = []
-    for follow in follows:
-        # Get following user details
-        try:
-            following_user = await db.users.find_one({"_id": ObjectId(follow["following_id"])})
-            if following_user:
-                following.append({
-                    "_id": str(follow["_id"]),
-                    "created_at": follow["created_at"],
-                    "following": {
-                        "_id": str(following_user["_id"]),
-                        "name": following_user["name"],
-                        "location": following_user["location"],
-                        "email": following_user["email"]
-                    }
-                })
-        except Exception:
-            continue  # Skip invalid following IDs
+    for follow, following_user in zip(follows, following_users):
+        if following_user:
+            following.append({
+                "_id": str(follow["_id"]),
+                "created_at": follow["created_at"],
+                "following": {
+                    "_id": str(following_user["_id"]),
+                    "name": following_user["name"],
+                    "location": following_user["location"],
+                    "email": following_user["email"]
+                }
+            })
     
-    return following
+    return page_response(following, cursor, next_cursor)
 
 @api_router.get("/users/{user_id}/follow-stats")
 async def get_user_follow_stats(user_id: str, current_user_id: Optional[str] = None):
     """Get user's follow statistics"""
-    # Count followers and following
-    followers_count = await db.follows.count_documents({"following_id": user_id})
-    following_count = await db.follows.count_documents({"follower_id": user_id})
-    
-    is_following = None
-    if current_user_id:
-        follow_relationship = await db.follows.find_one({
-            "follower_id": current_user_id,
-            "following_id": user_id
-        })
-        is_following = follow_relationship is not None
+    async def load_counts():
+        if not ObjectId.is_valid(user_id):
+            return None
+        return await db.users.find_one(
+            {"_id": ObjectId(user_id)}, {"followers_count": 1, "following_count": 1}
+        )
+    
+    async def load_is_following():
+        if not current_user_id:
+            return None
+        return (await follow_status(current_user_id, [user_id]))[user_id]
     
+    # Counts are maintained on the user document by follow/unfollow (see rebuild-follow-counts)
+    counts, is_following = await asyncio.gather(load_counts(), load_is_following())
+    counts = counts or {}
     return FollowStats(
         user_id=user_id,
-        followers_count=followers_count,
-        following_count=following_count,
+        followers_count=max(counts.get("followers_count", 0), 0),
+        following_count=max(counts.get("following_count", 0), 0),
         is_following=is_following
     )
 
+@api_router.post("/users/{current_user_id}/follow-status", response_model=Dict[str, bool])
+async def get_follow_status(current_user_id: str, batch: IdBatch):
+    """Map each target id to whether current_user_id follows it, for rendering follow buttons"""
+    return await follow_status(current_user_id, batch_ids(batch))
+
 @api_router.get("/feed/following")
-async def get_following_feed(current_user_id: str, limit: int = 20, skip: int = 0):
+async def get_following_feed(
+    current_user_id: str,
+    limit: int = 20,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    loaders: RequestLoaders = Depends(get_loaders)
+):
     """Get recent listings from users you follow"""
-    # Get users that current user follows
-    follows = await db.follows.find({"follower_id": current_user_id}).to_list(length=1000)
-    following_user_ids = [follow["following_id"] for follow in follows]
-    
-    if not following_user_ids:
-        return []  # User doesn't follow anyone
-    
-    # Get listings from followed users
-    listings = await db.listings.find({
-        "user_id": {"$in": following_user_ids},
-        "is_active": True
-    }).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    after = decode_cursor(cursor, "created_at") if cursor else None
+    wanted = (0 if cursor is not None else skip) + limit + 1
+    
+    # Timelines can hold listings deactivated since they were pushed; keep reading until the page is full
+    sellers = await direct_sellers(db, current_user_id)
+    listings = []
+    while len(listings) < wanted:
+        count = wanted - len(listings)
+        refs = await feed_refs(db, current_user_id, count, after, sellers)
+        if not refs:
+            break
+        after = (refs[-1]["created_at"], refs[-1]["_id"])
+        loaded = await loaders.listings.load_many([str(ref["_id"]) for ref in refs])
+        listings += [listing for listing in loaded if listing and listing.get("is_active")]
+        if len(refs) < count:
+            break
+    
+    if cursor is None:
+        listings, next_cursor = listings[skip:skip + limit], None
+    else:
+        listings, next_cursor = split_page(listings, limit, "created_at")
     
-    # Enrich listings with seller information
+    # Enrich listings with seller information; sellers repeat across a feed page
+    sellers = await loaders.users.load_many([listing["user_id"] for listing in listings])
     feed_items = []
-    for listing in listings:
-        try:
-            seller = await db.users.find_one({"_id": ObjectId(listing["user_id"])})
-            if seller:
-                listing_dict = serialize_object_id(listing)
-                listing_dict["seller_name"] = seller["name"]
-                listing_dict["seller_location"] = seller["location"]
-                # Ensure created_at is included
-                if "created_at" not in listing_dict:
-                    listing_dict["created_at"] = listing.get("created_at")
-                feed_items.append(listing_dict)
-        except Exception:
-            continue  # Skip listings with invalid user IDs
-    
-    return feed_items
+    for listing, seller in zip(listings, sellers):
+        if seller:
+            # The Listing model drops moderation and bookkeeping fields stored on the document
+            listing_dict = Listing(**serialize_listing_card(listing)).model_dump(by_alias=True)
+            listing_dict["seller_name"] = seller["name"]
+            listing_dict["seller_location"] = seller["location"]
+            feed_items.append(listing_dict)
+    
+    return page_response(feed_items, cursor, next_cursor)
+
+@api_router.get("/admin/users", response_model=None, responses={200: {"model": List[dict]}})
+async def get_all_users(limit: int = 1000, skip: int = 0, cursor: Optional[str] = None):
+    """User directory with active listing and message counts, newest first"""
+    limit = max(1, min(limit, 1000))
+    users, next_cursor = await fetch_page(
+        db.users, {}, "created_at", -1, limit, skip, cursor, {"password": 0}  # Exclude password field
+    )
+    return page_response(await with_activity_counts(users), cursor, next_cursor)
+
+# Admin - Stream every user for offline analysis
+@api_router.get("/admin/users/export")
+async def export_users(format: str = "ndjson"):
+    if format == "csv":
+        return StreamingResponse(
+            export_users_csv(),
+            media_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=users.csv"}
+        )
+    if format != "ndjson":
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    return StreamingResponse(export_users_ndjson(), media_type="application/x-ndjson")
 
-@api_router.get("/admin/users", response_model=List[dict])
-async def get_all_users():
-    cursor = db.users.find({}, {"password": 0})  # Exclude password field
-    users = await cursor.to_list(length=1000)
-    
-    # Add user statistics
-    users_with_stats = []
-    for user in users:
-        user = serialize_object_id(user)
-        
-        # Count user's listings
-        listing_count = await db.listings.count_documents({
-            "user_id": user["_id"], 
-            "is_active": True
-        })
-        
-        # Count user's messages
-        message_count = await db.messages.count_documents({
-            "$or": [
-                {"sender_id": user["_id"]},
-                {"receiver_id": user["_id"]}
-            ]
-        })
-        
-        user["listing_count"] = listing_count
-        user["message_count"] = message_count
-        users_with_stats.append(user)
-    
-    return users_with_stats
+# Admin - Response cache metrics
+@api_router.get("/admin/cache-stats", response_model=dict)
+async def get_cache_stats():
+    return response_cache.stats()
+
+@api_router.get("/admin/realtime-stats", response_model=dict)
+async def get_realtime_stats():
+    return broker.stats()
 
 # Admin - Get user statistics
 @api_router.get("/admin/stats", response_model=dict)
-async def get_admin_stats():
-    total_users = await db.users.count_documents({})
-    active_listings = await db.listings.count_documents({"is_active": True})
-    total_messages = await db.messages.count_documents({})
-    
-    # Users registered in last 30 days
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_users = await db.users.count_documents({
-        "created_at": {"$gte": thirty_days_ago}
-    })
-    
-    # Listings by category
-    poultry_count = await db.listings.count_documents({"category": "poultry", "is_active": True})
-    coop_count = await db.listings.count_documents({"category": "coop", "is_active": True})
-    cage_count = await db.listings.count_documents({"category": "cage", "is_active": True})
-    eggs_count = await db.listings.count_documents({"category": "eggs", "is_active": True})
-    
-    # Admin notification counts
-    unread_notifications = await db.admin_notifications.count_documents({"read": False})
-    high_priority_notifications = await db.admin_notifications.count_documents({
-        "read": False, 
-        "priority": {"$in": ["high", "urgent"]}
-    })
-    
-    # Flagged listings count
-    unreviewed_flags = await db.listing_flags.count_documents({"reviewed": False})
-    
-    return {
-        "total_users": total_users,
-        "active_listings": active_listings,
-        "total_messages": total_messages,
-        "recent_users": recent_users,
-        "listings_by_category": {
-            "poultry": poultry_count,
-            "coop": coop_count,
-            "cage": cage_count,
-            "eggs": eggs_count
-        },
-        "admin_alerts": {
-            "unread_notifications": unread_notifications,
-            "high_priority_notifications": high_priority_notifications,
-            "unreviewed_flags": unreviewed_flags
-        }
-    }
+async def get_admin_stats(fresh: bool = False):
+    """Dashboard counts from the background snapshot; fresh=true computes them live"""
+    global admin_stats_snapshot
+    if fresh or admin_stats_snapshot is None or ADMIN_STATS_REFRESH_SECONDS <= 0:
+        admin_stats_snapshot = await compute_admin_stats()
+    return admin_stats_snapshot
 
 # === Admin Listing Management Endpoints ===
 
@@ -934,10 +2123,14 @@ async def flag_listing(listing_id: str, flag_data: FlagCreate, current_user_id:
     flag_dict = flag_data.dict()
     flag_dict.update({
         "listing_id": listing_id,
-        "flagger_id": current_user_id
+        "flagger_id": current_user_id,
+        "created_at": datetime.utcnow(),
+        "reviewed": False
     })
     
     result = await db.listing_flags.insert_one(flag_dict)
+    # Denormalized so the moderation view's flagged filter is a single indexed predicate
+    await db.listings.update_one({"_id": listing["_id"]}, {"$inc": {"unreviewed_flag_count": 1}})
     
     # Create admin notification
     notification_data = {
@@ -949,23 +2142,40 @@ async def flag_listing(listing_id: str, flag_data: FlagCreate, current_user_id:
         "read": False,
         "created_at": datetime.utcnow()
     }
-    await db.admin_notifications.insert_one(notification_data)
+    await create_admin_notification(notification_data)
     
     return {"message": "Listing flagged successfully"}
 
 # Get all admin notifications
 @api_router.get("/admin/notifications")
-async def get_admin_notifications(unread_only: bool = False, limit: int = 50):
-    """Get admin notifications with priority items first"""
-    filter_query = {}
+async def get_admin_notifications(
+    unread_only: bool = False,
+    limit: int = 50,
+    skip: int = 0,
+    cursor: Optional[str] = None
+):
+    """Get admin notifications, unread first, then by priority and recency"""
     if unread_only:
-        filter_query["read"] = False
-    
-    notifications = await db.admin_notifications.find(filter_query).sort([
-        ("priority", -1), ("created_at", -1)
-    ]).limit(limit).to_list(length=limit)
+        notifications, next_cursor = await fetch_compound_page(
+            db.admin_notifications, {"read": False}, NOTIFICATION_QUEUE_SORT[1:], limit, skip, cursor
+        )
+    else:
+        notifications, next_cursor = await fetch_compound_page(
+            db.admin_notifications, {}, NOTIFICATION_QUEUE_SORT, limit, skip, cursor
+        )
     
-    return [serialize_object_id(notification) for notification in notifications]
+    return page_response([serialize_object_id(notification) for notification in notifications], cursor, next_cursor)
+
+# Live notification and stats stream for the admin dashboard
+@api_router.get("/admin/events")
+async def stream_admin_events(request: Request, last_event_id: Optional[str] = None):
+    """Server-Sent Events; reconnecting clients resume from the Last-Event-ID header"""
+    last_event_id = request.headers.get("last-event-id") or last_event_id
+    return StreamingResponse(
+        admin_event_stream(request, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 # Mark notification as read
 @api_router.patch("/admin/notifications/{notification_id}/read")
@@ -990,9 +2200,16 @@ async def get_admin_listings(
     category: Optional[str] = None,
     search: Optional[str] = None,
     limit: int = 50,
-    skip: int = 0
+    skip: int = 0,
+    view: str = "full",
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    loaders: RequestLoaders = Depends(get_loaders)
 ):
     """Get all listings with admin information and flag status"""
+    projection = listing_projection(view, fields)
+    if projection:
+        projection["user_id"] = 1  # Needed for seller enrichment
     
     # Build query
     query = {}
@@ -1001,10 +2218,8 @@ async def get_admin_listings(
     elif status == "inactive":
         query["is_active"] = False
     elif status == "flagged":
-        # Get listing IDs that have been flagged
-        flagged_listings = await db.listing_flags.find({"reviewed": False}).to_list(length=1000)
-        flagged_listing_ids = [flag["listing_id"] for flag in flagged_listings]
-        query["_id"] = {"$in": [ObjectId(lid) for lid in flagged_listing_ids]}
+        # Maintained by flag_listing and clear_flags; served by the flagged_created partial index
+        query["unreviewed_flag_count"] = {"$gt": 0}
     
     if category:
         query["category"] = category
@@ -1017,35 +2232,41 @@ async def get_admin_listings(
         ]
     
     # Get listings
-    listings = await db.listings.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(length=limit)
+    listings, next_cursor = await fetch_page(
+        db.listings, query, "created_at", -1, limit, skip, cursor, projection
+    )
+    
+    # Enrich with seller info, flags and admin actions: one batched query per collection
+    listing_ids = [str(listing["_id"]) for listing in listings]
+    sellers, flag_groups, action_groups = await asyncio.gather(
+        loaders.users.load_many([listing.get("user_id") for listing in listings]),
+        loaders.listing_flags.load_many(listing_ids),
+        loaders.admin_actions.load_many(listing_ids)
+    )
     
-    # Enrich with seller info and flag information
     enriched_listings = []
-    for listing in listings:
-        try:
+    for listing, seller, flags, actions in zip(listings, sellers, flag_groups, action_groups):
+        if view == "summary" and not fields:
+            listing_dict = listing_summary(listing).dict(by_alias=True)
+        else:
             listing_dict = serialize_object_id(listing)
-            
-            # Get seller information
-            seller = await db.users.find_one({"_id": ObjectId(listing["user_id"])})
-            if seller:
-                listing_dict["seller_name"] = seller["name"]
-                listing_dict["seller_email"] = seller["email"]
-            
-            # Get flag information
-            flags = await db.listing_flags.find({"listing_id": listing_dict["_id"]}).to_list(length=100)
-            listing_dict["flags"] = [serialize_object_id(flag) for flag in flags]
-            listing_dict["flag_count"] = len(flags)
-            listing_dict["unreviewed_flags"] = len([f for f in flags if not f.get("reviewed", False)])
-            
-            # Get admin actions history
-            actions = await db.admin_actions.find({"listing_id": listing_dict["_id"]}).sort("created_at", -1).to_list(length=10)
-            listing_dict["admin_actions"] = [serialize_object_id(action) for action in actions]
-            
-            enriched_listings.append(listing_dict)
-        except Exception:
-            continue
+        
+        # Seller information
+        if seller:
+            listing_dict["seller_name"] = seller["name"]
+            listing_dict["seller_email"] = seller["email"]
+        
+        # Flag information
+        listing_dict["flags"] = [serialize_object_id(flag) for flag in flags]
+        listing_dict["flag_count"] = len(flags)
+        listing_dict["unreviewed_flags"] = len([f for f in flags if not f.get("reviewed", False)])
+        
+        # Admin actions history
+        listing_dict["admin_actions"] = [serialize_object_id(action) for action in actions]
+        
+        enriched_listings.append(listing_dict)
     
-    return enriched_listings
+    return page_response(enriched_listings, cursor, next_cursor)
 
 # Admin action on listing
 @api_router.post("/admin/listings/{listing_id}/action")
@@ -1065,29 +2286,32 @@ async def admin_listing_action(listing_id: str, action_data: AdminActionCreate,
     if action_data.action == "deactivate":
         await db.listings.update_one(
             {"_id": ObjectId(listing_id)},
-            {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
+            {"$set": {"is_active": False, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}}
         )
     elif action_data.action == "reactivate":
         await db.listings.update_one(
             {"_id": ObjectId(listing_id)},
-            {"$set": {"is_active": True, "updated_at": datetime.utcnow()}}
+            {"$set": {"is_active": True, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}}
         )
     elif action_data.action == "delete":
         await db.listings.delete_one({"_id": ObjectId(listing_id)})
     elif action_data.action == "clear_flags":
         # Mark all flags for this listing as reviewed
         await db.listing_flags.update_many(
-            {"listing_id": listing_id},
+            {"listing_id": listing_id, "reviewed": {"$ne": True}},
             {"$set": {"reviewed": True, "reviewed_by": admin_id, "reviewed_at": datetime.utcnow(), "action_taken": "cleared"}}
         )
+        await db.listings.update_one({"_id": ObjectId(listing_id)}, {"$set": {"unreviewed_flag_count": 0}})
     
     # Record the admin action
     action_record = action_data.dict()
     action_record.update({
         "listing_id": listing_id,
-        "admin_id": admin_id
+        "admin_id": admin_id,
+        "created_at": datetime.utcnow()
     })
     await db.admin_actions.insert_one(action_record)
+    await invalidate_listing_cache(listing_id, listing.get("category"))
     
     # Create success notification
     notification_data = {
@@ -1099,7 +2323,7 @@ async def admin_listing_action(listing_id: str, action_data: AdminActionCreate,
         "read": False,
         "created_at": datetime.utcnow()
     }
-    await db.admin_notifications.insert_one(notification_data)
+    await create_admin_notification(notification_data)
     
     return {"message": f"Listing {action_data.action}d successfully"}
 
@@ -1133,6 +2357,10 @@ async def get_flags_summary():
         "recent_flags_this_week": recent_flags
     }
 
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
 # Include the router in the main app
 app.include_router(api_router)
 
@@ -1149,8 +2377,4 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
-logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+logger = logging.getLogger(__name__)
\ No newline at end of file
@@ -0,0 +1,177 @@
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+# One document per follower: {_id: follower_id, entries: [{listing_id, seller_id, created_at}], direct_sellers},
+# entries kept newest-first and capped at TIMELINE_MAX_ENTRIES by every $push.
+# Each listing records fanned_out when created: timelines hold the fanned-out listings, and
+# the rest are merged in at read time, even if the seller later drops under the limit.
+# direct_sellers lists the followed sellers with has_unfanned_listings, so only they are read.
+TIMELINE_MAX_ENTRIES = int(os.environ.get('TIMELINE_MAX_ENTRIES', '500'))
+# Sellers with more followers than this are not fanned out; their listings are merged in at read time
+FANOUT_FOLLOWER_LIMIT = int(os.environ.get('TIMELINE_FANOUT_LIMIT', '5000'))
+FANOUT_BATCH_SIZE = 500
+BACKFILL_ENTRIES = 20  # recent listings copied in when a seller is followed
+REBUILD_ENTRIES = 100
+
+
+def timeline_entry(listing: dict) -> dict:
+    return {"listing_id": listing["_id"], "seller_id": listing["user_id"], "created_at": listing.get("created_at")}
+
+
+def _push(entries: List[dict]) -> dict:
+    return {"$push": {"entries": {
+        "$each": entries,
+        "$sort": {"created_at": -1, "listing_id": -1},
+        "$slice": TIMELINE_MAX_ENTRIES
+    }}}
+
+
+async def fans_out(db, seller_id: str) -> bool:
+    """Whether a seller's listings are pushed to follower timelines rather than read at query time"""
+    if not ObjectId.is_valid(seller_id):
+        return False
+    seller = await db.users.find_one({"_id": ObjectId(seller_id)}, {"followers_count": 1})
+    return bool(seller) and seller.get("followers_count", 0) <= FANOUT_FOLLOWER_LIMIT
+
+
+async def _update_follower_timelines(db, seller_id: str, update: dict) -> int:
+    written = 0
+    batch = []
+    async for follow in db.follows.find({"following_id": seller_id}, {"follower_id": 1}):
+        batch.append(UpdateOne({"_id": follow["follower_id"]}, update, upsert=True))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            await db.timelines.bulk_write(batch, ordered=False)
+            written += len(batch)
+            batch = []
+    if batch:
+        await db.timelines.bulk_write(batch, ordered=False)
+        written += len(batch)
+    return written
+
+
+async def fan_out_listing(db, listing: dict) -> int:
+    """Push a new fanned_out listing onto every follower's timeline; returns the number of timelines written"""
+    seller_id = listing["user_id"]
+    if listing.get("fanned_out"):
+        return await _update_follower_timelines(db, seller_id, _push([timeline_entry(listing)]))
+    if not ObjectId.is_valid(seller_id):
+        return 0
+    # The seller's first unfanned listing adds them to each follower's direct_sellers, once
+    result = await db.users.update_one(
+        {"_id": ObjectId(seller_id), "has_unfanned_listings": {"$ne": True}},
+        {"$set": {"has_unfanned_listings": True}}
+    )
+    if not result.modified_count:
+        return 0
+    return await _update_follower_timelines(db, seller_id, {"$addToSet": {"direct_sellers": seller_id}})
+
+
+async def backfill_timeline(db, follower_id: str, seller_id: str, limit: int = BACKFILL_ENTRIES):
+    """Copy a newly followed seller's recent fanned_out listings into the follower's timeline"""
+    listings = await db.listings.find(
+        {"user_id": seller_id, "is_active": True, "fanned_out": True}, {"user_id": 1, "created_at": 1}
+    ).sort([("created_at", -1), ("_id", -1)]).limit(limit).to_list(length=limit)
+    entries = [timeline_entry(listing) for listing in listings]
+    if entries:
+        await db.timelines.update_one({"_id": follower_id}, _push(entries), upsert=True)
+    if ObjectId.is_valid(seller_id) and await db.users.count_documents(
+        {"_id": ObjectId(seller_id), "has_unfanned_listings": True}, limit=1
+    ):
+        await db.timelines.update_one(
+            {"_id": follower_id}, {"$addToSet": {"direct_sellers": seller_id}}, upsert=True
+        )
+
+
+async def remove_from_timeline(db, follower_id: str, seller_id: str):
+    await db.timelines.update_one(
+        {"_id": follower_id}, {"$pull": {"entries": {"seller_id": seller_id}, "direct_sellers": seller_id}}
+    )
+
+
+async def direct_sellers(db, follower_id: str) -> List[str]:
+    """Followed sellers whose unfanned listings are merged into the feed at read time"""
+    timeline = await db.timelines.find_one({"_id": follower_id}, {"direct_sellers": 1})
+    return (timeline or {}).get("direct_sellers", [])
+
+
+async def read_timeline(db, follower_id: str, count: int,
+                        after: Optional[tuple] = None) -> List[dict]:
+    """Newest-first timeline entries, optionally strictly after a (created_at, listing_id) position"""
+    entries = "$entries"
+    if after:
+        created_at, listing_id = after
+        entries = {"$filter": {"input": "$entries", "as": "entry", "cond": {"$or": [
+            {"$lt": ["$$entry.created_at", created_at]},
+            {"$and": [
+                {"$eq": ["$$entry.created_at", created_at]},
+                {"$lt": ["$$entry.listing_id", listing_id]}
+            ]}
+        ]}}}
+    result = await db.timelines.aggregate([
+        {"$match": {"_id": follower_id}},
+        {"$project": {"entries": {"$slice": [entries, count]}}}
+    ]).to_list(length=1)
+    return result[0]["entries"] if result else []
+
+
+async def feed_refs(db, follower_id: str, count: int, after: Optional[tuple] = None,
+                    sellers: Optional[List[str]] = None) -> List[dict]:
+    """Newest-first {_id, created_at} refs: timeline entries merged with unfanned listings of sellers"""
+    entries = await read_timeline(db, follower_id, count, after)
+    refs = [{"_id": entry["listing_id"], "created_at": entry["created_at"]} for entry in entries]
+
+    if sellers:
+        query = {"user_id": {"$in": sellers}, "is_active": True, "fanned_out": False}
+        if after:
+            created_at, listing_id = after
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": listing_id}}
+            ]
+        refs += await db.listings.find(query, {"created_at": 1}).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).limit(count).to_list(length=count)
+        refs.sort(key=lambda ref: (ref.get("created_at") or datetime.min, ref["_id"]), reverse=True)
+    return refs[:count]
+
+
+async def backfill_fanout_flags(db) -> int:
+    """Record fanned_out on listings created before the flag existed, from each seller's current size"""
+    flagged = 0
+    for seller_id in await db.listings.distinct("user_id", {"fanned_out": {"$exists": False}}):
+        result = await db.listings.update_many(
+            {"user_id": seller_id, "fanned_out": {"$exists": False}},
+            {"$set": {"fanned_out": await fans_out(db, seller_id)}}
+        )
+        flagged += result.modified_count
+    unfanned_sellers = await db.listings.distinct("user_id", {"fanned_out": False})
+    await db.users.update_many(
+        {"_id": {"$in": [ObjectId(seller_id) for seller_id in unfanned_sellers if ObjectId.is_valid(seller_id)]}},
+        {"$set": {"has_unfanned_listings": True}}
+    )
+    return flagged
+
+
+async def backfill_listing_dates(db) -> int:
+    """Set created_at from the ObjectId on listings stored before create_listing recorded it"""
+    result = await db.listings.update_many(
+        {"created_at": {"$exists": False}}, [{"$set": {"created_at": {"$toDate": "$_id"}}}]
+    )
+    return result.modified_count
+
+
+async def rebuild_timelines(db) -> int:
+    """Rebuild every follower's timeline from follows and recent listings; returns follows processed"""
+    rebuilt = 0
+    # Timeline entries and the feed's keyset order both need created_at on every listing
+    await backfill_listing_dates(db)
+    await backfill_fanout_flags(db)
+    await db.timelines.delete_many({})
+    async for follow in db.follows.find({}, {"follower_id": 1, "following_id": 1}):
+        await backfill_timeline(db, follow["follower_id"], follow["following_id"], limit=REBUILD_ENTRIES)
+        rebuilt += 1
+    return rebuilt
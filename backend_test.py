@@ -384,6 +384,44 @@ class PoultryAPITester:
             print(f"❌ Get All Listings: Exception - {str(e)}")
             return False
     
+    def test_listing_cursor_pagination(self):
+        """Test keyset pagination of listings with next_cursor"""
+        print("\n=== Testing Listing Cursor Pagination ===")
+        try:
+            response = self.session.get(f"{API_BASE_URL}/listings?limit=1&cursor=")
+            print(f"Status Code: {response.status_code}")
+            
+            if response.status_code != 200:
+                print(f"❌ Listing Cursor Pagination: Failed with status {response.status_code}")
+                return False
+            
+            first_page = response.json()
+            if "items" not in first_page or "next_cursor" not in first_page:
+                print("❌ Listing Cursor Pagination: Response is not an items/next_cursor envelope")
+                return False
+            
+            if not first_page["next_cursor"]:
+                print("✅ Listing Cursor Pagination: PASSED (single page)")
+                return True
+            
+            response = self.session.get(
+                f"{API_BASE_URL}/listings?limit=1&cursor={first_page['next_cursor']}"
+            )
+            second_page = response.json()
+            first_id = first_page["items"][0]["_id"]
+            second_ids = [item["_id"] for item in second_page.get("items", [])]
+            print(f"First page: {first_id}, second page: {second_ids}")
+            
+            if response.status_code == 200 and second_ids and first_id not in second_ids:
+                print("✅ Listing Cursor Pagination: PASSED")
+                return True
+            else:
+                print("❌ Listing Cursor Pagination: Second page overlaps the first or is empty")
+                return False
+        except Exception as e:
+            print(f"❌ Listing Cursor Pagination: Exception - {str(e)}")
+            return False
+    
     def test_get_specific_listing(self):
         """Test get specific listing endpoint"""
         print("\n=== Testing Get Specific Listing ===")
@@ -436,6 +474,53 @@ class PoultryAPITester:
             print(f"❌ Get User Listings: Exception - {str(e)}")
             return False
     
+    def test_listing_image_storage(self):
+        """Test listing images are stored by hash and served from /api/images"""
+        print("\n=== Testing Listing Image Storage ===")
+        # 1x1 transparent PNG
+        png_data_url = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+        try:
+            listing_data = {
+                "title": "Silkie Chicks With Photo",
+                "description": "Fluffy silkie chicks, photo attached.",
+                "category": "poultry",
+                "price": 12.00,
+                "images": [png_data_url, png_data_url],
+                "location": "Rural Valley, TX",
+                "breed": "Silkie"
+            }
+            response = self.session.post(
+                f"{API_BASE_URL}/listings?user_id={self.user_id}",
+                json=listing_data
+            )
+            print(f"Status Code: {response.status_code}")
+            
+            if response.status_code != 200:
+                print(f"❌ Listing Image Storage: Create failed with status {response.status_code}")
+                return False
+            
+            images = response.json().get("images", [])
+            print(f"Image references: {images}")
+            if len(images) != 2 or not all(image.startswith("/api/images/") for image in images):
+                print("❌ Listing Image Storage: Images were not stored as references")
+                return False
+            if images[0] != images[1]:
+                print("❌ Listing Image Storage: Identical images were not deduplicated")
+                return False
+            
+            image_response = self.session.get(f"{BACKEND_URL}{images[0]}")
+            print(f"Image Status Code: {image_response.status_code}")
+            print(f"Cache-Control: {image_response.headers.get('Cache-Control')}")
+            if image_response.status_code == 200 and image_response.headers.get("Content-Type") == "image/png":
+                print("✅ Listing Image Storage: PASSED")
+                return True
+            else:
+                print("❌ Listing Image Storage: Stored image could not be fetched")
+                return False
+        except Exception as e:
+            print(f"❌ Listing Image Storage: Exception - {str(e)}")
+            return False
+    
     def test_search_functionality(self):
         """Test search listings endpoint"""
         print("\n=== Testing Search Functionality ===")
@@ -616,7 +701,8 @@ class PoultryAPITester:
         """Test admin statistics include eggs count"""
         print("\n=== Testing Admin Statistics with Eggs ===")
         try:
-            response = self.session.get(f"{API_BASE_URL}/admin/stats")
+            # Bypass the background snapshot so the eggs listing created above is counted
+            response = self.session.get(f"{API_BASE_URL}/admin/stats?fresh=true")
             print(f"GET /api/admin/stats - Status Code: {response.status_code}")
             print(f"Response: {response.json()}")
             
@@ -691,6 +777,27 @@ class PoultryAPITester:
                         conversations = response2.json()
                         print(f"Found {len(conversations)} conversations")
                         if isinstance(conversations, list):
+                            thread_url = f"{API_BASE_URL}/conversations/{self.test_listing_id}/{self.user_2_id}/messages?user_id={self.user_id}"
+                            
+                            # Another user's token can't read the thread
+                            response_denied = self.session.get(
+                                thread_url, headers={"Authorization": f"Bearer {self.user_2_token}"}
+                            )
+                            print(f"Get Thread With Other Token - Status Code: {response_denied.status_code}")
+                            if response_denied.status_code != 403:
+                                print("❌ Messaging System: Thread readable with another user's token")
+                                return False
+                            
+                            # Reading the thread as the receiver marks the message read
+                            response3 = self.session.get(
+                                thread_url, headers={"Authorization": f"Bearer {self.user_token}"}
+                            )
+                            print(f"Get Thread - Status Code: {response3.status_code}")
+                            thread = response3.json() if response3.status_code == 200 else []
+                            sent = [m for m in thread if m.get("_id") == message_id]
+                            if not sent or not sent[0].get("read"):
+                                print("❌ Messaging System: Thread missing the message or not marked read")
+                                return False
                             print("✅ Messaging System: PASSED")
                             return True
                         else:
@@ -709,6 +816,47 @@ class PoultryAPITester:
             print(f"❌ Messaging System: Exception - {str(e)}")
             return False
 
+    def unread_count(self, user_id):
+        return self.session.get(f"{API_BASE_URL}/users/{user_id}/unread-count").json()["unread_count"]
+
+    def test_unread_count(self):
+        """Test the unread badge count rises on a new message and drops once the thread is read"""
+        print("\n=== Testing Unread Count ===")
+        if not self.test_listing_id or not self.user_2_id:
+            print("❌ Unread Count: Missing required test data")
+            return False
+            
+        try:
+            before = self.unread_count(self.user_id)
+            response = self.session.post(f"{API_BASE_URL}/messages?sender_id={self.user_2_id}", json={
+                "receiver_id": self.user_id,
+                "listing_id": self.test_listing_id,
+                "content": "Do you deliver to Farm City?"
+            })
+            print(f"Send Message - Status Code: {response.status_code}")
+            after_send = self.unread_count(self.user_id)
+            print(f"Unread count: {before} -> {after_send}")
+            if response.status_code != 200 or after_send != before + 1:
+                print("❌ Unread Count: Did not go up by one after a new message")
+                return False
+            
+            response2 = self.session.get(
+                f"{API_BASE_URL}/conversations/{self.test_listing_id}/{self.user_2_id}/messages?user_id={self.user_id}",
+                headers={"Authorization": f"Bearer {self.user_token}"}
+            )
+            after_read = self.unread_count(self.user_id)
+            print(f"Get Thread - Status Code: {response2.status_code}, unread count after read: {after_read}")
+            
+            if response2.status_code == 200 and after_read == before:
+                print("✅ Unread Count: PASSED")
+                return True
+            else:
+                print("❌ Unread Count: Did not drop back after reading the thread")
+                return False
+        except Exception as e:
+            print(f"❌ Unread Count: Exception - {str(e)}")
+            return False
+
     def test_advanced_search_system(self):
         """Test advanced search endpoint with various filter combinations"""
         print("\n=== Testing Advanced Search System ===")
@@ -992,6 +1140,81 @@ class PoultryAPITester:
             print(f"❌ Enhanced User Profile: Exception - {str(e)}")
             return False
 
+    def etag_round_trip(self, url):
+        """Fetch url, then repeat with If-None-Match; returns (etag, conditional status code)"""
+        etag = self.session.get(url).headers.get("ETag")
+        if not etag:
+            return None, None
+        return etag, self.session.get(url, headers={"If-None-Match": etag}).status_code
+
+    def test_conditional_requests(self):
+        """Test ETag/If-None-Match 304s, and that ETags change after a rating or a follow"""
+        print("\n=== Testing Conditional Requests ===")
+        if not self.user_id or not self.user_2_id:
+            print("❌ Conditional Requests: Missing required test data")
+            return False
+            
+        try:
+            response = self.session.post(f"{API_BASE_URL}/listings?user_id={self.user_id}", json={
+                "title": "Silkie Hatching Eggs",
+                "description": "Fertile Silkie hatching eggs.",
+                "category": "poultry",
+                "price": 18.0,
+                "images": [],
+                "location": "Rural Valley, TX"
+            })
+            if response.status_code != 200:
+                print(f"❌ Conditional Requests: Listing creation failed with status {response.status_code}")
+                return False
+            listing_id = response.json()["_id"]
+            urls = {
+                "listing": f"{API_BASE_URL}/listings/{listing_id}",
+                "profile": f"{API_BASE_URL}/users/{self.user_id}",
+                "rating summary": f"{API_BASE_URL}/sellers/{self.user_id}/rating-summary"
+            }
+            
+            etags = {}
+            for name, url in urls.items():
+                etag, status_code = self.etag_round_trip(url)
+                print(f"{name} - ETag: {etag}, conditional Status Code: {status_code}")
+                if not etag or status_code != 304:
+                    print(f"❌ Conditional Requests: {name} did not answer If-None-Match with 304")
+                    return False
+                etags[name] = etag
+            print("✅ If-None-Match 304: PASSED")
+            
+            # A new rating changes the seller's listings, profile and rating summary
+            response2 = self.session.post(f"{API_BASE_URL}/ratings?buyer_id={self.user_2_id}", json={
+                "seller_id": self.user_id, "listing_id": listing_id, "rating": 4
+            })
+            print(f"Create rating - Status Code: {response2.status_code}")
+            if response2.status_code != 200:
+                print("❌ Conditional Requests: Rating creation failed")
+                return False
+            for name, url in urls.items():
+                etag, status_code = self.etag_round_trip(url)
+                if etag == etags[name] or status_code != 304:
+                    print(f"❌ Conditional Requests: {name} ETag unchanged after a rating")
+                    return False
+                etags[name] = etag
+            print("✅ ETags Change After Rating: PASSED")
+            
+            # A follow changes the followed user's profile; undo it so the follow tests start clean
+            self.session.post(f"{API_BASE_URL}/users/{self.user_id}/follow?current_user_id={self.user_2_id}")
+            followed_etag, _ = self.etag_round_trip(urls["profile"])
+            self.session.delete(f"{API_BASE_URL}/users/{self.user_id}/follow?current_user_id={self.user_2_id}")
+            print(f"Profile ETag before/after follow: {etags['profile']} / {followed_etag}")
+            
+            if followed_etag and followed_etag != etags["profile"]:
+                print("✅ Conditional Requests: PASSED")
+                return True
+            else:
+                print("❌ Conditional Requests: Profile ETag unchanged after a follow")
+                return False
+        except Exception as e:
+            print(f"❌ Conditional Requests: Exception - {str(e)}")
+            return False
+
     def test_advanced_search_with_ratings(self):
         """Test advanced search with rating filters"""
         print("\n=== Testing Advanced Search with Rating Filters ===")
@@ -1035,6 +1258,118 @@ class PoultryAPITester:
             print(f"❌ Advanced Search with Rating Filters: Exception - {str(e)}")
             return False
 
+    def test_rating_sort_pagination(self):
+        """Test rating sort order, skip paging on the rating sort and the min_rating filter"""
+        print("\n=== Testing Rating Sort Pagination ===")
+        try:
+            response = self.session.post(f"{API_BASE_URL}/advanced-search", json={
+                "sort_by": "rating", "sort_order": "desc", "limit": 2, "skip": 0
+            })
+            print(f"Status Code: {response.status_code}")
+            
+            if response.status_code != 200:
+                print(f"❌ Rating Sort Pagination: Failed with status {response.status_code}")
+                return False
+            
+            first_two = response.json()
+            ratings = [listing.get("seller_avg_rating", 0) for listing in first_two]
+            if ratings != sorted(ratings, reverse=True):
+                print(f"❌ Rating Sort Pagination: Not sorted by seller_avg_rating: {ratings}")
+                return False
+            
+            # skip must apply before limit, so the second page starts at the second result
+            response2 = self.session.post(f"{API_BASE_URL}/advanced-search", json={
+                "sort_by": "rating", "sort_order": "desc", "limit": 1, "skip": 1
+            })
+            second_page = response2.json() if response2.status_code == 200 else []
+            if len(first_two) == 2 and [listing["_id"] for listing in second_page] != [first_two[1]["_id"]]:
+                print("❌ Rating Sort Pagination: skip=1 page does not match the second result")
+                return False
+            
+            response3 = self.session.post(f"{API_BASE_URL}/advanced-search", json={
+                "min_rating": 4, "sort_by": "rating", "limit": 50
+            })
+            filtered = response3.json() if response3.status_code == 200 else None
+            print(f"min_rating=4 results: {len(filtered) if filtered is not None else response3.status_code}")
+            
+            if filtered is not None and all(listing.get("seller_avg_rating", 0) >= 4 for listing in filtered):
+                print("✅ Rating Sort Pagination: PASSED")
+                return True
+            else:
+                print("❌ Rating Sort Pagination: min_rating returned lower-rated sellers")
+                return False
+        except Exception as e:
+            print(f"❌ Rating Sort Pagination: Exception - {str(e)}")
+            return False
+
+    def test_radius_distance_search(self):
+        """Test radius filtering and distance sorting against a listing with a known location"""
+        print("\n=== Testing Radius and Distance Search ===")
+        if not self.user_id:
+            print("❌ Radius Search: Missing required test data")
+            return False
+            
+        try:
+            response = self.session.post(f"{API_BASE_URL}/listings?user_id={self.user_id}", json={
+                "title": "Austin Buff Orpington Pullets",
+                "description": "Buff Orpington pullets, ready to lay.",
+                "category": "poultry",
+                "price": 30.0,
+                "images": [],
+                "location": "Austin, TX",
+                "breed": "Buff Orpington"
+            })
+            print(f"Create Austin listing - Status Code: {response.status_code}")
+            if response.status_code != 200:
+                print(f"❌ Radius Search: Listing creation failed with status {response.status_code}")
+                return False
+            listing_id = response.json()["_id"]
+            
+            # 78701 is downtown Austin; Dallas is roughly 180 miles away
+            nearby = self.session.post(f"{API_BASE_URL}/advanced-search", json={
+                "location": "78701", "radius_miles": 25, "limit": 100
+            })
+            far = self.session.post(f"{API_BASE_URL}/advanced-search", json={
+                "location": "Dallas, TX", "radius_miles": 25, "limit": 100
+            })
+            print(f"Radius searches - Status Codes: {nearby.status_code}, {far.status_code}")
+            if nearby.status_code != 200 or far.status_code != 200:
+                print("❌ Radius Search: Radius search failed")
+                return False
+            if listing_id not in [listing["_id"] for listing in nearby.json()]:
+                print("❌ Radius Search: Listing missing from a 25 mile search around Austin")
+                return False
+            if listing_id in [listing["_id"] for listing in far.json()]:
+                print("❌ Radius Search: Listing returned by a 25 mile search around Dallas")
+                return False
+            print("✅ Radius Filter: PASSED")
+            
+            by_distance = self.session.post(f"{API_BASE_URL}/advanced-search", json={
+                "location": "78701", "sort_by": "distance", "limit": 20
+            })
+            distances = [listing.get("distance_miles") for listing in by_distance.json()] \
+                if by_distance.status_code == 200 else []
+            print(f"Distance sort - Status Code: {by_distance.status_code}, distances: {distances[:5]}")
+            if not distances or None in distances or distances != sorted(distances):
+                print("❌ Distance Sort: Results missing distance_miles or not nearest first")
+                return False
+            
+            # Text queries can be combined with distance sorting
+            text_by_distance = self.session.post(f"{API_BASE_URL}/advanced-search", json={
+                "query": "Orpington", "location": "78701", "sort_by": "distance", "limit": 20
+            })
+            print(f"Text query with distance sort - Status Code: {text_by_distance.status_code}")
+            
+            if text_by_distance.status_code == 200 and listing_id in [listing["_id"] for listing in text_by_distance.json()]:
+                print("✅ Radius and Distance Search: PASSED")
+                return True
+            else:
+                print("❌ Radius and Distance Search: Text query with distance sort failed")
+                return False
+        except Exception as e:
+            print(f"❌ Radius and Distance Search: Exception - {str(e)}")
+            return False
+
     def test_follow_user_functionality(self):
         """Test follow user endpoint with various scenarios"""
         print("\n=== Testing Follow User Functionality ===")
@@ -1316,6 +1651,90 @@ class PoultryAPITester:
             print(f"❌ Follow Statistics: Exception - {str(e)}")
             return False
 
+    def follow_counts(self, user_id):
+        stats = self.session.get(f"{API_BASE_URL}/users/{user_id}/follow-stats").json()
+        return stats["followers_count"], stats["following_count"]
+
+    def test_follow_counters(self):
+        """Test that follow and unfollow move both users' stored counters by one"""
+        print("\n=== Testing Follow Counters ===")
+        if not self.user_id or not self.user_2_id:
+            print("❌ Follow Counters: Missing required test data")
+            return False
+            
+        try:
+            # Start from user 1 not following user 2
+            self.session.delete(f"{API_BASE_URL}/users/{self.user_2_id}/follow?current_user_id={self.user_id}")
+            followers_before, _ = self.follow_counts(self.user_2_id)
+            _, following_before = self.follow_counts(self.user_id)
+            
+            response = self.session.post(f"{API_BASE_URL}/users/{self.user_2_id}/follow?current_user_id={self.user_id}")
+            print(f"Follow - Status Code: {response.status_code}")
+            followers_after, _ = self.follow_counts(self.user_2_id)
+            _, following_after = self.follow_counts(self.user_id)
+            print(f"Followers {followers_before} -> {followers_after}, following {following_before} -> {following_after}")
+            if response.status_code != 200 or (followers_after, following_after) != (followers_before + 1, following_before + 1):
+                print("❌ Follow Counters: Follow did not increment both counters")
+                return False
+            
+            # A repeated follow is rejected and must not count twice
+            self.session.post(f"{API_BASE_URL}/users/{self.user_2_id}/follow?current_user_id={self.user_id}")
+            if self.follow_counts(self.user_2_id)[0] != followers_after:
+                print("❌ Follow Counters: Duplicate follow changed the followers count")
+                return False
+            
+            response2 = self.session.delete(f"{API_BASE_URL}/users/{self.user_2_id}/follow?current_user_id={self.user_id}")
+            print(f"Unfollow - Status Code: {response2.status_code}")
+            
+            if (response2.status_code == 200 and self.follow_counts(self.user_2_id)[0] == followers_before and
+                    self.follow_counts(self.user_id)[1] == following_before):
+                print("✅ Follow Counters: PASSED")
+                return True
+            else:
+                print("❌ Follow Counters: Unfollow did not restore both counters")
+                return False
+        except Exception as e:
+            print(f"❌ Follow Counters: Exception - {str(e)}")
+            return False
+
+    def test_follow_status_batch(self):
+        """Test the batched follow-status lookup used to render follow buttons"""
+        print("\n=== Testing Follow Status Batch ===")
+        if not self.user_id or not self.user_2_id:
+            print("❌ Follow Status: Missing required test data")
+            return False
+            
+        try:
+            unknown_id = "000000000000000000000000"
+            self.session.post(f"{API_BASE_URL}/users/{self.user_2_id}/follow?current_user_id={self.user_id}")
+            response = self.session.post(
+                f"{API_BASE_URL}/users/{self.user_id}/follow-status",
+                json={"ids": [self.user_2_id, unknown_id]}
+            )
+            print(f"Follow status while following - Status Code: {response.status_code}")
+            print(f"Response: {response.json()}")
+            if response.status_code != 200 or response.json() != {self.user_2_id: True, unknown_id: False}:
+                print("❌ Follow Status: Wrong status while following")
+                return False
+            
+            # The cached following set must be dropped on unfollow
+            self.session.delete(f"{API_BASE_URL}/users/{self.user_2_id}/follow?current_user_id={self.user_id}")
+            response2 = self.session.post(
+                f"{API_BASE_URL}/users/{self.user_id}/follow-status",
+                json={"ids": [self.user_2_id]}
+            )
+            print(f"Follow status after unfollow - Status Code: {response2.status_code}")
+            
+            if response2.status_code == 200 and response2.json() == {self.user_2_id: False}:
+                print("✅ Follow Status Batch: PASSED")
+                return True
+            else:
+                print("❌ Follow Status: Still following after unfollow")
+                return False
+        except Exception as e:
+            print(f"❌ Follow Status Batch: Exception - {str(e)}")
+            return False
+
     def test_following_feed(self):
         """Test following feed endpoint"""
         print("\n=== Testing Following Feed ===")
@@ -1800,6 +2219,48 @@ class PoultryAPITester:
             print(f"❌ Admin Notifications System: Exception - {str(e)}")
             return False
 
+    def test_admin_notification_priority_order(self):
+        """Test that unread notifications come urgent/high before normal/low, across cursor pages"""
+        print("\n=== Testing Admin Notification Priority Order ===")
+        ranks = {"low": 0, "normal": 1, "high": 2, "urgent": 3}
+        try:
+            response = self.session.get(f"{API_BASE_URL}/admin/notifications?unread_only=true&limit=100")
+            print(f"Status Code: {response.status_code}")
+            
+            if response.status_code != 200:
+                print(f"❌ Notification Priority Order: Failed with status {response.status_code}")
+                return False
+            
+            priorities = [ranks.get(notification.get("priority"), 1) for notification in response.json()]
+            if priorities != sorted(priorities, reverse=True):
+                print(f"❌ Notification Priority Order: Skip page out of order: {priorities}")
+                return False
+            
+            # Walk a few one-item cursor pages; the order must hold across page boundaries
+            paged = []
+            cursor = ""
+            for _ in range(5):
+                response = self.session.get(f"{API_BASE_URL}/admin/notifications?unread_only=true&limit=1&cursor={cursor}")
+                if response.status_code != 200:
+                    print(f"❌ Notification Priority Order: Cursor page failed with status {response.status_code}")
+                    return False
+                page = response.json()
+                paged += [ranks.get(notification.get("priority"), 1) for notification in page["items"]]
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+            print(f"Skip page priorities: {priorities[:10]}, cursor page priorities: {paged}")
+            
+            if paged == sorted(paged, reverse=True) and paged == priorities[:len(paged)]:
+                print("✅ Notification Priority Order: PASSED")
+                return True
+            else:
+                print("❌ Notification Priority Order: Cursor pages out of order")
+                return False
+        except Exception as e:
+            print(f"❌ Notification Priority Order: Exception - {str(e)}")
+            return False
+
     def test_admin_listings_management(self):
         """Test admin listings endpoint with filtering and flag information"""
         print("\n=== Testing Admin Listings Management ===")
@@ -2123,10 +2584,13 @@ class PoultryAPITester:
         test_results['get_user_profile'] = self.test_get_user_profile()
         test_results['create_listing'] = self.test_create_listing()
         test_results['get_all_listings'] = self.test_get_all_listings()
+        test_results['listing_cursor_pagination'] = self.test_listing_cursor_pagination()
         test_results['get_specific_listing'] = self.test_get_specific_listing()
         test_results['get_user_listings'] = self.test_get_user_listings()
+        test_results['listing_image_storage'] = self.test_listing_image_storage()
         test_results['search_functionality'] = self.test_search_functionality()
         test_results['messaging_system'] = self.test_messaging_system()
+        test_results['unread_count'] = self.test_unread_count()
         
         # Eggs functionality tests
         test_results['eggs_category_support'] = self.test_eggs_category_support()
@@ -2139,13 +2603,18 @@ class PoultryAPITester:
         test_results['rating_system_creation'] = self.test_rating_system_creation()
         test_results['rating_system_retrieval'] = self.test_rating_system_retrieval()
         test_results['enhanced_user_profile'] = self.test_enhanced_user_profile()
+        test_results['conditional_requests'] = self.test_conditional_requests()
         test_results['advanced_search_with_ratings'] = self.test_advanced_search_with_ratings()
+        test_results['rating_sort_pagination'] = self.test_rating_sort_pagination()
+        test_results['radius_distance_search'] = self.test_radius_distance_search()
         
         # Follow System tests
         test_results['follow_user_functionality'] = self.test_follow_user_functionality()
         test_results['unfollow_user_functionality'] = self.test_unfollow_user_functionality()
         test_results['followers_following_lists'] = self.test_followers_following_lists()
         test_results['follow_statistics'] = self.test_follow_statistics()
+        test_results['follow_counters'] = self.test_follow_counters()
+        test_results['follow_status_batch'] = self.test_follow_status_batch()
         test_results['following_feed'] = self.test_following_feed()
         test_results['follow_system_integration'] = self.test_follow_system_integration()
         test_results['follow_system_edge_cases'] = self.test_follow_system_edge_cases()
@@ -2153,6 +2622,7 @@ class PoultryAPITester:
         # Admin Listing Management System tests
         test_results['flag_listing_functionality'] = self.test_flag_listing_functionality()
         test_results['admin_notifications_system'] = self.test_admin_notifications_system()
+        test_results['admin_notification_priority_order'] = self.test_admin_notification_priority_order()
         test_results['admin_listings_management'] = self.test_admin_listings_management()
         test_results['admin_listing_actions'] = self.test_admin_listing_actions()
         test_results['admin_flags_summary'] = self.test_admin_flags_summary()